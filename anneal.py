@@ -3,30 +3,28 @@
 from itertools import izip
 import math
 import json
-from time import clock
+from time import clock, time
 from simanneal import Annealer
-from random import uniform
-from config import RELEVANT_JOINT_PAIRS
+import numpy as np
+from random import uniform, sample, random
+from binary import fresh_binary_file_name, BinaryRecording
+from config import get_config, configure_from_options
+from frames import FrameStore
+from instrument import current as current_instrumentation
+from stream import json_hash_to_vector, label_switch, iter_skeleton_chunks
 
 from sys import argv
 
-def json_hash_to_vector(vector_str):
-    'Convert a JSON hash representing a vector to a collection of numbers.'
-    return map(float, (vector_str['X'], vector_str['Y'], vector_str['Z']))
-
-def label_switch(enum_value):
-    'Convert a JSON integer value so that; Yes => 1, No => -1, Null => 0'
-    return {0 : 1, 1 : -1, 2 : 0}[enum_value]
-
 def load_skeleton_data(file_name):
-    with open(file_name) as f_obj:
-        skeleton_data = json.load(f_obj)
-    for frame in skeleton_data:
-        for joint_type in frame['jointPositions']['jointPositionDict'].keys():
-            vector = json_hash_to_vector(frame['jointPositions']['jointPositionDict'][joint_type])
-            frame['jointPositions']['jointPositionDict'][joint_type] = vector
-        frame['label'] = label_switch(frame['label'])
-    return skeleton_data
+    '''Load a recording into a FrameStore.
+Iterating the store yields dict-style frames shaped like the JSON frames.
+A binary copy of the recording is read instead when it is newer than the
+recording, see binary.convert_recording. Otherwise the file is parsed
+incrementally, see stream.iter_skeleton_chunks.'''
+    binary_name = fresh_binary_file_name(file_name)
+    if binary_name is not None:
+        return BinaryRecording(binary_name).read()
+    return FrameStore.concatenate(iter_skeleton_chunks(file_name))
 
 def distance(initial, terminal):
     'Return the distance between two positions.'
@@ -36,7 +34,7 @@ def generate_distances(frame):
     'Generates distances between relevant joints.'
     positions = frame[u'jointPositions'][u'jointPositionDict']
     distance_frame = {}
-    for initial_joint_name, terminal_joint_name in RELEVANT_JOINT_PAIRS:
+    for initial_joint_name, terminal_joint_name in get_config().relevant_joint_pairs:
         initial_joint_position = positions[initial_joint_name]
         terminal_joint_position = positions[terminal_joint_name]
         joint_key = (initial_joint_name, terminal_joint_name)
@@ -47,29 +45,287 @@ def generate_distances(frame):
     distance_frame['label'] = frame['label']
     return distance_frame
 
-def difference(joint_datum, weights):
-    'Return the difference between the approximate solution with weights and the'
+def weighted_sum(joint_datum, weights):
+    'Return the sum of the distances of a distance frame times their weights.'
     accum = 0 
-    for joint_name, weight in izip(RELEVANT_JOINT_PAIRS, weights):
+    for joint_name, weight in izip(get_config().relevant_joint_pairs, weights):
         accum += (joint_datum[joint_name] * weight)
-    return accum + joint_datum['label']
+    return accum
+
+def difference(joint_datum, weights):
+    'Return the difference between the approximate solution with weights and the'
+    return weighted_sum(joint_datum, weights) + joint_datum['label']
 
 def tweak(value):
     'Tweak the given value.'
     return value + uniform(-0.05, 0.05)
     
+def distance_dicts_to_matrix(distances):
+    'Convert distance frames from generate_distances into a feature matrix and a label vector.'
+    joint_pairs = get_config().relevant_joint_pairs
+    features = np.array([[distance_frame[joint_pair] for joint_pair in joint_pairs]
+                         for distance_frame in distances], dtype=np.float64)
+    labels = np.array([distance_frame['label'] for distance_frame in distances], dtype=np.float64)
+    return features.reshape(len(labels), len(joint_pairs)), labels
+
+MOVE_STRATEGIES = ('all', 'single', 'block')
+
 class KinectWeightsProblem(Annealer):
-    'A class with methods defined for generating weights for classifying joint data.'
-    def __init__(self, joint_data):
-        self.joint_data = joint_data
-        self.state = [uniform(-0.5, 0.5) for _ in RELEVANT_JOINT_PAIRS]
+    '''A class with methods defined for generating weights for classifying joint data.
+The joint data is either a list of distance frames from generate_distances or
+a (frames x pairs) feature matrix given with its label vector.
+
+The move strategy 'all' tweaks every weight on each move. 'single' and
+'block' tweak one weight or block_size weights and keep the residual of
+every frame cached, so a move costs O(frames) and returns its energy change.'''
+    regularization_rate = 2
+    copy_strategy = 'slice'
+    residual_refresh_interval = 10000
+    def __init__(self, joint_data, labels=None, move_strategy='all', block_size=1):
+        if labels is None:
+            joint_data, labels = distance_dicts_to_matrix(joint_data)
+        if move_strategy not in MOVE_STRATEGIES:
+            raise ValueError('unknown move strategy %r' % (move_strategy,))
+        self.features = np.ascontiguousarray(joint_data, dtype=np.float64)
+        self.labels = np.asarray(labels, dtype=np.float64)
+        self.move_strategy = move_strategy
+        self.block_size = 1 if move_strategy == 'single' else block_size
+        self.state = [uniform(-0.5, 0.5) for _ in xrange(self.features.shape[1])]
+        self._feature_columns = np.asfortranarray(self.features)
+        self._residuals = None
+        self._residual_state = None
+        self._undo = None
+        self._moves_since_refresh = 0
+        self.energy_evaluations = 0
     def move(self):
-        self.state = [tweak(weight) for weight in self.state]
+        if self.move_strategy == 'all':
+            self.state = [tweak(weight) for weight in self.state]
+        else:
+            return self._move_block()
+    def _sync_residuals(self):
+        '''Make the cached residuals belong to the current state.
+The annealer restores a copy of the previous state after a rejected move, so
+the residuals from before that move are reused when the state matches them.'''
+        if self._residual_state is self.state:
+            return
+        if self._undo is not None and self.state == self._undo[0]:
+            _, self._residuals, self._fitness = self._undo
+        else:
+            self._refresh_residuals()
+        self._residual_state = self.state
+        self._undo = None
+    def _refresh_residuals(self):
+        self._residuals = np.dot(self.features, self.state) + self.labels
+        self._fitness = float(np.dot(self._residuals, self._residuals))
+        self._moves_since_refresh = 0
+    def _move_block(self):
+        'Tweak a block of weights in place and return the change in energy.'
+        self._sync_residuals()
+        if self._moves_since_refresh >= self.residual_refresh_interval:
+            ## Keep rounding errors from the incremental updates in check.
+            self._refresh_residuals()
+        self._undo = (self.state[:], self._residuals, self._fitness)
+        columns = sample(xrange(len(self.state)), min(self.block_size, len(self.state)))
+        deltas = [uniform(-0.05, 0.05) for _ in columns]
+        residuals = self._residuals + np.dot(self._feature_columns[:, columns], deltas)
+        fitness = float(np.dot(residuals, residuals))
+        regularization_change = 0
+        for column, delta in izip(columns, deltas):
+            weight = self.state[column]
+            regularization_change += (weight + delta) ** 2 - weight ** 2
+            self.state[column] = weight + delta
+        energy_change = fitness - self._fitness + self.regularization_rate * regularization_change
+        self.energy_evaluations += 1
+        self._residuals = residuals
+        self._fitness = fitness
+        self._residual_state = self.state
+        self._moves_since_refresh += 1
+        return energy_change
     def energy(self):
-        fitness = sum(difference(joint_datum, self.state) ** 2 for joint_datum in self.joint_data)
-        regularization_rate = 2
-        regularization = regularization_rate * sum(state ** 2 for state in self.state)
-        return fitness + regularization
+        self.energy_evaluations += 1
+        regularization = self.regularization_rate * sum(state ** 2 for state in self.state)
+        if self._residual_state is self.state:
+            return self._fitness + regularization
+        residuals = np.dot(self.features, self.state) + self.labels
+        fitness = np.dot(residuals, residuals)
+        return float(fitness + regularization)
+    def anneal(self):
+        'Anneal the weights and report the step and energy evaluation rates to the instrumentation.'
+        energy_evaluations = self.energy_evaluations
+        start = time()
+        result = Annealer.anneal(self)
+        seconds = time() - start
+        instrumentation = current_instrumentation()
+        instrumentation.record_rate('anneal_steps', self.steps, seconds)
+        instrumentation.record_rate('energy_evaluations', self.energy_evaluations - energy_evaluations, seconds)
+        return result
+
+class MiniBatchWeightsProblem(KinectWeightsProblem):
+    '''A KinectWeightsProblem whose energy is estimated on a random mini-batch of frames.
+The batch is scaled so its energy estimates the energy over all the frames and
+it is drawn again every batch_refresh_interval steps, so a step costs
+O(batch_size) however many frames there are. Every checkpoint_interval steps
+the energy over all the frames is checked. The best state is chosen by those
+checks and annealing stops early once the best energy improves by less than
+tolerance, relative to it, for patience checkpoints in a row. The chain
+wanders while the temperature is high, so checkpoints only count towards
+stopping after the burn_in share of the steps.'''
+    batch_refresh_interval = 500
+    checkpoint_interval = 2000
+    patience = 3
+    burn_in = 0.5
+    def __init__(self, joint_data, labels=None, batch_size=1024, tolerance=1e-4,
+                 move_strategy='all', block_size=1):
+        KinectWeightsProblem.__init__(self, joint_data, labels, move_strategy, block_size)
+        self.full_features = self.features
+        self.full_labels = self.labels
+        self.batch_size = min(batch_size, len(self.full_labels))
+        self.tolerance = tolerance
+        self.checkpoints = []
+        self.stopped_early = False
+        self.draw_batch()
+    def draw_batch(self):
+        'Estimate the energy on a new random mini-batch of frames from now on.'
+        frame_count = len(self.full_labels)
+        if self.batch_size < frame_count:
+            rows = np.array(sample(xrange(frame_count), self.batch_size))
+        else:
+            rows = slice(None)
+        ## Scaling the rows by sqrt(frames / batch size) scales the fitness by
+        ## frames / batch size, so the moves of the base class work unchanged.
+        scale = math.sqrt(float(frame_count) / max(self.batch_size, 1))
+        self.features = self.full_features[rows] * scale
+        self.labels = self.full_labels[rows] * scale
+        self._feature_columns = np.asfortranarray(self.features)
+        self._residual_state = None
+        self._undo = None
+    def full_energy(self):
+        'Return the energy of the current state over all the frames.'
+        residuals = np.dot(self.full_features, self.state) + self.full_labels
+        return float(np.dot(residuals, residuals)
+                     + self.regularization_rate * np.dot(self.state, self.state))
+    def auto_schedule(self, minutes, steps=2000):
+        '''Set a temperature schedule for an anneal of about the given minutes with simanneal's auto.
+The search runs on the mini-batch and annealing starts from the current state
+afterwards. Return the schedule.'''
+        state = self.copy_state(self.state)
+        schedule = self.auto(minutes, steps)
+        self.set_schedule(schedule)
+        self.state = state
+        self.draw_batch()
+        return schedule
+    def _checkpoint(self, step):
+        'Check the energy of the current state over all the frames and return whether it stalled.'
+        energy = self.full_energy()
+        self.checkpoints.append((step, energy))
+        previous_best = self.best_energy
+        if energy < self.best_energy:
+            self.best_state = self.copy_state(self.state)
+            self.best_energy = energy
+        return previous_best - self.best_energy < self.tolerance * abs(previous_best)
+    def anneal(self):
+        '''Anneal the weights on mini-batches with the exponential cooling of simanneal.
+Return the best state found at a checkpoint and its energy over all the frames.'''
+        if self.Tmin <= 0.0:
+            raise ValueError('exponential cooling needs a minimum temperature above zero')
+        energy_evaluations = self.energy_evaluations
+        self.start = time()
+        cooling = -math.log(self.Tmax / self.Tmin)
+        T = self.Tmax
+        E = self.energy()
+        previous_state, previous_energy = self.copy_state(self.state), E
+        self.best_state = self.copy_state(self.state)
+        self.best_energy = self.full_energy()
+        self.checkpoints = [(0, self.best_energy)]
+        self.stopped_early = False
+        stalled_checkpoints = 0
+        trials, accepts, improves = 0, 0, 0
+        if self.updates > 0:
+            self.update(0, T, self.best_energy, None, None)
+        step = 0
+        while step < self.steps and not self.user_exit:
+            step += 1
+            T = self.Tmax * math.exp(cooling * step / self.steps)
+            energy_change = self.move()
+            if energy_change is None:
+                E = self.energy()
+                energy_change = E - previous_energy
+            else:
+                E += energy_change
+            trials += 1
+            if energy_change > 0.0 and math.exp(-energy_change / T) < random():
+                self.state = self.copy_state(previous_state)
+                E = previous_energy
+            else:
+                accepts += 1
+                if energy_change < 0.0:
+                    improves += 1
+                previous_state, previous_energy = self.copy_state(self.state), E
+            if step % self.checkpoint_interval == 0:
+                stalled = self._checkpoint(step)
+                if step >= self.burn_in * self.steps:
+                    stalled_checkpoints = stalled_checkpoints + 1 if stalled else 0
+                if self.updates > 0:
+                    self.update(step, T, self.checkpoints[-1][1],
+                                float(accepts) / trials, float(improves) / trials)
+                    trials, accepts, improves = 0, 0, 0
+                if stalled_checkpoints >= self.patience:
+                    self.stopped_early = True
+                    break
+            if step % self.batch_refresh_interval == 0 and self.batch_size < len(self.full_labels):
+                self.draw_batch()
+                E = self.energy()
+                previous_state, previous_energy = self.copy_state(self.state), E
+        if step % self.checkpoint_interval:
+            self._checkpoint(step)
+        self.state = self.copy_state(self.best_state)
+        seconds = time() - self.start
+        instrumentation = current_instrumentation()
+        instrumentation.record_rate('anneal_steps', step, seconds)
+        instrumentation.record_rate('energy_evaluations', self.energy_evaluations - energy_evaluations, seconds)
+        return self.best_state, self.best_energy
+
+def solve_ridge_weights(features, labels, regularization_rate=KinectWeightsProblem.regularization_rate):
+    '''Return the weights minimizing the KinectWeightsProblem energy and that energy.
+The energy is a ridge regression objective, so the weights solve
+(X'X + rate * I) w = -X'y directly.'''
+    features = np.asarray(features, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.float64)
+    gram = np.dot(features.T, features)
+    gram[np.diag_indices_from(gram)] += regularization_rate
+    weights = np.linalg.solve(gram, -np.dot(features.T, labels))
+    residuals = np.dot(features, weights) + labels
+    energy = np.dot(residuals, residuals) + regularization_rate * np.dot(weights, weights)
+    return weights.tolist(), float(energy)
+
+def anneal_weights(features, labels, move_strategy='all', block_size=1):
+    'Return the weights found by annealing a KinectWeightsProblem and their energy.'
+    return KinectWeightsProblem(features, labels,
+                                move_strategy=move_strategy,
+                                block_size=block_size).anneal()
+
+def minibatch_anneal_weights(features, labels, move_strategy='all', block_size=1, batch_size=1024,
+                             tolerance=1e-4, auto_schedule_minutes=0):
+    '''Return the weights found by annealing a MiniBatchWeightsProblem and their energy over all the frames.
+The schedule is tuned for an anneal of about auto_schedule_minutes when that is given.'''
+    problem = MiniBatchWeightsProblem(features, labels, batch_size, tolerance, move_strategy, block_size)
+    if auto_schedule_minutes:
+        problem.auto_schedule(auto_schedule_minutes)
+    return problem.anneal()
+
+def ridge_weights(features, labels, **_):
+    'Return the weights found by solving the ridge objective directly and their energy.'
+    return solve_ridge_weights(features, labels)
+
+TRAINERS = {
+    'anneal' : anneal_weights,
+    'minibatch' : minibatch_anneal_weights,
+    'ridge' : ridge_weights,
+}
+
+def train_weights(trainer, features, labels, **options):
+    'Train weights with the named trainer and return them with their energy.'
+    return TRAINERS[trainer](features, labels, **options)
 
 def signum(n):
     'Return a number representing the sign of the given number.'
@@ -89,12 +345,13 @@ A list with 10 items and a ratio of 0.3 would return two lists with 3 items in t
     return items[:pivot], items[pivot:]
 
 def score_weights(distances, weights):
-    'Score the weights and return score data.'
+    '''Score the weights and return score data.
+A frame is predicted as -sign(Xw), the label OnlineClassifier.classify returns.'''
     good_score = 0
     bad_score = 0
     error_score = 0
     for frame_datum in distances:
-        sign = signum(difference(frame_datum, weights))
+        sign = -signum(weighted_sum(frame_datum, weights))
         label = frame_datum['label']
         if sign == -1 and label == 1:
             bad_score += 1
@@ -108,9 +365,57 @@ def score_weights(distances, weights):
         'good' : good_score,
         'bad' : bad_score,
         'error' : error_score,
-        'accuracy' : (1.0 * good_score / (good_score + bad_score))
+        'accuracy' : accuracy(good_score, bad_score)
     }
 
+def accuracy(good_score, bad_score):
+    'Return the share of good scores among good and bad ones, or 0 when there are neither.'
+    if good_score + bad_score == 0:
+        return 0.0
+    return 1.0 * good_score / (good_score + bad_score)
+
+def _confusion_scores(labels, signs):
+    '''Return one score dictionary for every column of a (frames x vectors) sign matrix,
+counted the way score_weights counts them.'''
+    cells = ((labels[:, np.newaxis] + 1) * 3 + (signs + 1)
+             + 9 * np.arange(signs.shape[1])[np.newaxis, :])
+    confusions = np.bincount(cells.ravel(), minlength=9 * signs.shape[1]).reshape(-1, 3, 3)
+    scores = []
+    for confusion in confusions:
+        good_score = int(np.trace(confusion))
+        bad_score = int(confusion[0, 2] + confusion[2, 0])
+        scores.append({
+            'good' : good_score,
+            'bad' : bad_score,
+            'error' : int(confusion.sum()) - good_score - bad_score,
+            'accuracy' : accuracy(good_score, bad_score),
+            'confusion' : confusion,
+        })
+    return scores
+
+def score_weight_matrix(features, labels, weights):
+    '''Score the predictions of the weights against a feature matrix.
+A frame is predicted as -sign(Xw), the label OnlineClassifier.classify returns,
+since training fits Xw to the negated label. The counts match score_weights
+and the 3 x 3 confusion matrix has the labels -1, 0, 1 as rows and the
+predictions -1, 0, 1 as columns.
+The 'legacy' entry holds the counts of the old rule, which compared the sign
+of Xw plus the label itself with the label and so is not the accuracy of any
+classifier. It is kept to compare with results scored the old way.
+The weights are either one weight vector or a (vectors x pairs) stack of them.
+Return one score dictionary, or a list of them for a stack of weights.'''
+    weights = np.asarray(weights, dtype=np.float64)
+    stacked = weights.ndim == 2
+    weights = np.atleast_2d(weights)
+    labels = np.asarray(labels).astype(np.intp)
+    outputs = np.dot(features, weights.T)
+    scores = _confusion_scores(labels, -np.sign(outputs).astype(np.intp))
+    legacy_scores = _confusion_scores(labels, np.sign(outputs + labels[:, np.newaxis]).astype(np.intp))
+    for score, legacy_score in zip(scores, legacy_scores):
+        del legacy_score['confusion']
+        score['legacy'] = legacy_score
+    return scores if stacked else scores[0]
+
 class BadOptionInfoException(Exception):
     pass
 
@@ -135,11 +440,20 @@ def load_option_info(filename):
         missing_required_keys = []
         bad_values = []
         if 'dir_name' not in option_info:
-            missing_required_value += 'dir_name'
+            missing_required_keys.append('dir_name')
         if 'file_name' not in option_info:
-            missing_required_keys += 'file_name'
+            missing_required_keys.append('file_name')
         if 'training_ratio' not in option_info:
-            missing_required_keys += 'training_ratio'
+            missing_required_keys.append('training_ratio')
+        else:
+            try:
+                option_info['training_ratio'] = float(option_info['training_ratio'])
+            except ValueError:
+                bad_values.append(('training_ratio', option_info['training_ratio']))
+        try:
+            option_info['folds'] = int(option_info.get('folds', 0))
+        except ValueError:
+            bad_values.append(('folds', option_info['folds']))
         if 'shuffle_seed' not in option_info:
             option_info['shuffle_seed'] = clock()
         else:
@@ -154,10 +468,41 @@ def load_option_info(filename):
                 option_info['training_seed'] = float(option_info['training_seed'])
             except ValueError:
                 bad_values.append(('training_seed', option_info['training_seed']))
+        option_info.setdefault('trainer', 'anneal')
+        if option_info['trainer'] != 'both' and option_info['trainer'] not in TRAINERS:
+            bad_values.append(('trainer', option_info['trainer']))
+        try:
+            option_info['chains'] = int(option_info.get('chains', 1))
+        except ValueError:
+            bad_values.append(('chains', option_info['chains']))
+        option_info.setdefault('move_strategy', 'all')
+        if option_info['move_strategy'] not in MOVE_STRATEGIES:
+            bad_values.append(('move_strategy', option_info['move_strategy']))
+        try:
+            option_info['move_block_size'] = int(option_info.get('move_block_size', 1))
+        except ValueError:
+            bad_values.append(('move_block_size', option_info['move_block_size']))
+        try:
+            option_info['batch_size'] = int(option_info.get('batch_size', 1024))
+        except ValueError:
+            bad_values.append(('batch_size', option_info['batch_size']))
+        try:
+            option_info['early_stop_tolerance'] = float(option_info.get('early_stop_tolerance', 1e-4))
+        except ValueError:
+            bad_values.append(('early_stop_tolerance', option_info['early_stop_tolerance']))
+        try:
+            option_info['auto_schedule_minutes'] = float(option_info.get('auto_schedule_minutes', 0))
+        except ValueError:
+            bad_values.append(('auto_schedule_minutes', option_info['auto_schedule_minutes']))
+        try:
+            option_info['feature_cache_bytes'] = int(option_info.get('feature_cache_bytes', 1 << 30))
+        except ValueError:
+            bad_values.append(('feature_cache_bytes', option_info['feature_cache_bytes']))
         if missing_required_keys:
             raise BadOptionKeysException(missing_required_keys)
         if bad_values:
             raise BadOptionValuesException(bad_values)
+    configure_from_options(option_info)
     return option_info
 
 def auto_load_option_info():
@@ -1,17 +1,18 @@
 '''A script that loads some classified skeleton data and trains weights using it.'''
 import json
 from os.path import join
-from config import KINECT_EXPERIMENT_DIR
-from anneal import (generate_distances,
-                    KinectWeightsProblem,
-                    score_weights,
+from config import get_config
+from anneal import (train_weights,
+                    score_weight_matrix,
                     split_items,
-                    load_option_info,
-                    load_skeleton_data)
-from normal import (normalize_scale, normalize_origin)
+                    load_option_info)
+from cache import FeatureCache, cached_distance_matrix, recording_distance_matrix
+from chains import anneal_chains
+from crossval import cross_validate
+from instrument import enable as enable_instrumentation, current as current_instrumentation
 from random import shuffle
 from random import seed
-from time import clock
+from time import time
 
 #if __name__ == '__main__': # Emacs doesn't like this.
 
@@ -19,32 +20,103 @@ OPTION_INFO = load_option_info('option.json')
 
 ## Build path to file.
 EXPERIMENT_FILE_PATH  = join(
-    KINECT_EXPERIMENT_DIR,
+    get_config().kinect_experiment_dir,
     OPTION_INFO['dir_name'],
     OPTION_INFO['file_name']
 )
 
-## Open file and extract JSON frames data.
-FRAMES = normalize_scale(normalize_origin(load_skeleton_data(EXPERIMENT_FILE_PATH), 'HipCenter'),
-                         'HipCenter', 'Head')
-
-## Get the joint distances from the frame data.
-DISTANCES = map(generate_distances, FRAMES)
-
-## Split the distance data. Use one half for
-## training and the other half for testing.
-seed(OPTION_INFO['shuffle_seed'])
-shuffle(DISTANCES)
-TRAINING_DISTANCES, TESTING_DISTANCES = split_items(DISTANCES, 0.5)
-
-seed(OPTION_INFO['training_seed'])
-## Train the weights.
-WEIGHTS, _ = KinectWeightsProblem(TRAINING_DISTANCES).anneal()
-
-## Test the weights and display info on how well they work.
-SCORES = score_weights(TESTING_DISTANCES, WEIGHTS)
-print 'Good:\t%d' % SCORES['good']
-print 'Bad:\t%d' % SCORES['bad']
-print 'Error:\t%d' % SCORES['error']
-print 'Score:\t%.4f%%' % (SCORES['accuracy'] * 100)
-print json.dumps(WEIGHTS)
+## Record where the time goes when the option file names a report file.
+if 'instrumentation_file' in OPTION_INFO:
+    INSTRUMENTATION = enable_instrumentation()
+else:
+    INSTRUMENTATION = current_instrumentation()
+
+## Get the joint distances of the normalized frames, from the
+## feature cache when the option file names a cache directory.
+if 'feature_cache_dir' in OPTION_INFO:
+    FEATURES, LABELS = cached_distance_matrix(
+        EXPERIMENT_FILE_PATH,
+        FeatureCache(OPTION_INFO['feature_cache_dir'], OPTION_INFO['feature_cache_bytes']))
+else:
+    FEATURES, LABELS = recording_distance_matrix(EXPERIMENT_FILE_PATH)
+
+## Split the distance data. Use the training ratio of
+## it for training and the rest for testing.
+with INSTRUMENTATION.stage('shuffle_split') as STAGE:
+    STAGE['items'] = len(LABELS)
+    seed(OPTION_INFO['shuffle_seed'])
+    ORDER = range(len(LABELS))
+    shuffle(ORDER)
+    FEATURES, LABELS = FEATURES[ORDER], LABELS[ORDER]
+    TRAINING_FEATURES, TESTING_FEATURES = split_items(FEATURES, OPTION_INFO['training_ratio'])
+    TRAINING_LABELS, TESTING_LABELS = split_items(LABELS, OPTION_INFO['training_ratio'])
+
+if OPTION_INFO['trainer'] == 'both':
+    TRAINER_NAMES = ['anneal', 'ridge']
+else:
+    TRAINER_NAMES = [OPTION_INFO['trainer']]
+
+## The options of every trainer. The mini-batch trainer also takes its batch
+## size, early stopping tolerance and the minutes to tune its schedule for.
+MOVE_OPTIONS = {
+    'move_strategy' : OPTION_INFO['move_strategy'],
+    'block_size' : OPTION_INFO['move_block_size'],
+}
+TRAINER_OPTIONS = {
+    'anneal' : MOVE_OPTIONS,
+    'ridge' : MOVE_OPTIONS,
+    'minibatch' : dict(MOVE_OPTIONS,
+                       batch_size=OPTION_INFO['batch_size'],
+                       tolerance=OPTION_INFO['early_stop_tolerance'],
+                       auto_schedule_minutes=OPTION_INFO['auto_schedule_minutes']),
+}
+
+## Train and test the weights with every trainer and
+## display info on how well they work side by side.
+RESULTS = []
+for TRAINER in TRAINER_NAMES:
+    seed(OPTION_INFO['training_seed'])
+    START_TIME = time()
+    with INSTRUMENTATION.stage('train_' + TRAINER, len(TRAINING_LABELS)):
+        if TRAINER == 'anneal' and OPTION_INFO['chains'] > 1:
+            ## Anneal independent chains on every core, one seed per chain.
+            WEIGHTS, _, _ = anneal_chains(TRAINING_FEATURES, TRAINING_LABELS,
+                                          [OPTION_INFO['training_seed'] + i
+                                           for i in xrange(OPTION_INFO['chains'])],
+                                          move_strategy=OPTION_INFO['move_strategy'],
+                                          block_size=OPTION_INFO['move_block_size'])
+        else:
+            WEIGHTS, _ = train_weights(TRAINER, TRAINING_FEATURES, TRAINING_LABELS,
+                                       **TRAINER_OPTIONS[TRAINER])
+    TRAINING_TIME = time() - START_TIME
+    with INSTRUMENTATION.stage('score_' + TRAINER, len(TESTING_LABELS)):
+        SCORES = score_weight_matrix(TESTING_FEATURES, TESTING_LABELS, WEIGHTS)
+    RESULTS.append((TRAINER, TRAINING_TIME, SCORES, WEIGHTS))
+
+## Cross-validate every trainer on all the data when asked to.
+CROSS_VALIDATION = []
+if OPTION_INFO['folds'] > 1:
+    for TRAINER in TRAINER_NAMES:
+        with INSTRUMENTATION.stage('cross_validate_' + TRAINER, len(LABELS)):
+            CROSS_VALIDATION.append(cross_validate(FEATURES, LABELS, TRAINER,
+                                                   folds=OPTION_INFO['folds'],
+                                                   stratified=True,
+                                                   seed=int(OPTION_INFO['training_seed']),
+                                                   **TRAINER_OPTIONS[TRAINER]))
+
+if 'instrumentation_file' in OPTION_INFO:
+    INSTRUMENTATION.write_report(OPTION_INFO['instrumentation_file'])
+
+print 'Trainer:\t%s' % '\t'.join(trainer for trainer, _, _, _ in RESULTS)
+print 'Time:\t%s' % '\t'.join('%.3fs' % seconds for _, seconds, _, _ in RESULTS)
+print 'Good:\t%s' % '\t'.join('%d' % scores['good'] for _, _, scores, _ in RESULTS)
+print 'Bad:\t%s' % '\t'.join('%d' % scores['bad'] for _, _, scores, _ in RESULTS)
+print 'Error:\t%s' % '\t'.join('%d' % scores['error'] for _, _, scores, _ in RESULTS)
+print 'Score:\t%s' % '\t'.join('%.4f%%' % (scores['accuracy'] * 100) for _, _, scores, _ in RESULTS)
+print 'Legacy score:\t%s' % '\t'.join('%.4f%%' % (scores['legacy']['accuracy'] * 100)
+                                     for _, _, scores, _ in RESULTS)
+if CROSS_VALIDATION:
+    print 'CV mean:\t%s' % '\t'.join('%.4f%%' % (result['mean_accuracy'] * 100) for result in CROSS_VALIDATION)
+    print 'CV std:\t%s' % '\t'.join('%.4f%%' % (result['std_accuracy'] * 100) for result in CROSS_VALIDATION)
+for _, _, _, weights in RESULTS:
+    print json.dumps(weights)
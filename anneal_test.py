@@ -0,0 +1,131 @@
+import unittest
+import random
+from os.path import abspath, dirname, join
+from config import configure, get_config
+from anneal import (KinectWeightsProblem, MiniBatchWeightsProblem, difference,
+                    distance_dicts_to_matrix, solve_ridge_weights, score_weights,
+                    score_weight_matrix, signum)
+
+class TestKinectWeightsProblem(unittest.TestCase):
+    def setUp(self):
+        configure(kinect_experiment_dir=join(dirname(abspath(__file__)), 'KinectExperiment'))
+        random.seed(0)
+        self.distances = []
+        for _ in range(30):
+            distance_frame = {joint_pair : random.uniform(0, 2) for joint_pair in get_config().relevant_joint_pairs}
+            distance_frame['label'] = random.choice([-1, 0, 1])
+            self.distances.append(distance_frame)
+
+    def full_energy(self, weights):
+        return (sum(difference(distance_frame, weights) ** 2
+                    for distance_frame in self.distances)
+                + 2 * sum(weight ** 2 for weight in weights))
+
+    def tearDown(self):
+        configure(kinect_experiment_dir=None)
+
+    def test_energy(self):
+        'Check that the matrix energy matches the sum over distance frames.'
+        problem = KinectWeightsProblem(self.distances)
+        expected = self.full_energy(problem.state)
+        self.assertAlmostEqual(problem.energy(), expected, places=9)
+        features, labels = distance_dicts_to_matrix(self.distances)
+        matrix_problem = KinectWeightsProblem(features, labels)
+        matrix_problem.state = problem.state
+        self.assertAlmostEqual(matrix_problem.energy(), expected, places=9)
+
+    def test_block_moves(self):
+        'Check that block moves report the same energy change as a full recomputation.'
+        for move_strategy, block_size in (('single', 1), ('block', 3)):
+            problem = KinectWeightsProblem(self.distances, move_strategy=move_strategy,
+                                           block_size=block_size)
+            energy = problem.energy()
+            for _ in range(50):
+                previous_state = problem.state[:]
+                energy_change = problem.move()
+                changed = [a != b for a, b in zip(previous_state, problem.state)]
+                self.assertEqual(sum(changed), block_size)
+                full_energy = self.full_energy(problem.state)
+                self.assertAlmostEqual(energy + energy_change, full_energy, places=9)
+                if random.random() < 0.5:
+                    ## Reject the move the way the annealer does.
+                    problem.state = previous_state[:]
+                else:
+                    energy = full_energy
+                self.assertAlmostEqual(problem.energy(), energy, places=9)
+
+    def test_ridge_weights(self):
+        'Check that the direct solution is a minimum of the annealing energy.'
+        features, labels = distance_dicts_to_matrix(self.distances)
+        weights, energy = solve_ridge_weights(features, labels)
+        self.assertEqual(len(weights), len(get_config().relevant_joint_pairs))
+        self.assertAlmostEqual(energy, self.full_energy(weights), places=9)
+        for i in range(len(weights)):
+            for step in (-1e-3, 1e-3):
+                nudged = weights[:]
+                nudged[i] += step
+                self.assertTrue(self.full_energy(nudged) > energy)
+
+    def test_mini_batch_energy(self):
+        'Check that a scaled mini-batch estimates the energy over all the frames.'
+        features, labels = distance_dicts_to_matrix(self.distances)
+        problem = MiniBatchWeightsProblem(features, labels, batch_size=len(labels))
+        self.assertAlmostEqual(problem.energy(), self.full_energy(problem.state), places=9)
+        self.assertAlmostEqual(problem.full_energy(), self.full_energy(problem.state), places=9)
+        problem = MiniBatchWeightsProblem(features, labels, batch_size=10)
+        estimates = []
+        for _ in range(2000):
+            problem.draw_batch()
+            estimates.append(problem.energy())
+        expected = self.full_energy(problem.state)
+        self.assertTrue(abs(sum(estimates) / len(estimates) - expected) < 0.05 * expected)
+
+    def test_mini_batch_early_stopping(self):
+        'Check that annealing stops once the energy over all the frames stops improving.'
+        features, labels = distance_dicts_to_matrix(self.distances)
+        problem = MiniBatchWeightsProblem(features, labels, batch_size=10, tolerance=1.0,
+                                          move_strategy='block', block_size=2)
+        problem.updates = 0
+        problem.steps = 10000
+        problem.checkpoint_interval = 100
+        weights, energy = problem.anneal()
+        self.assertTrue(problem.stopped_early)
+        self.assertEqual(problem.checkpoints[-1][0], 5000 + 100 * (problem.patience - 1))
+        self.assertAlmostEqual(energy, self.full_energy(weights), places=9)
+        self.assertEqual(energy, min(checkpoint_energy for _, checkpoint_energy in problem.checkpoints))
+
+    def test_score_weight_matrix(self):
+        'Check that matrix scoring counts the predictions -sign(Xw) like score_weights and keeps the old counts.'
+        features, labels = distance_dicts_to_matrix(self.distances)
+        weight_stack = [[random.uniform(-0.5, 0.5) for _ in get_config().relevant_joint_pairs] for _ in range(4)]
+        stacked_scores = score_weight_matrix(features, labels, weight_stack)
+        self.assertEqual(len(stacked_scores), 4)
+        for weights, stacked_score in zip(weight_stack, stacked_scores):
+            predictions = [-signum(sum(distance_frame[joint_pair] * weight for joint_pair, weight
+                                       in zip(get_config().relevant_joint_pairs, weights)))
+                           for distance_frame in self.distances]
+            good = sum(1 for prediction, distance_frame in zip(predictions, self.distances)
+                       if prediction == distance_frame['label'])
+            bad = sum(1 for prediction, distance_frame in zip(predictions, self.distances)
+                      if prediction * distance_frame['label'] == -1)
+            legacy_signs = [signum(difference(distance_frame, weights)) for distance_frame in self.distances]
+            legacy_good = sum(1 for sign, distance_frame in zip(legacy_signs, self.distances)
+                              if sign == distance_frame['label'])
+            legacy_bad = sum(1 for sign, distance_frame in zip(legacy_signs, self.distances)
+                             if sign * distance_frame['label'] == -1)
+            scalar_score = score_weights(self.distances, weights)
+            confusion = [[0] * 3 for _ in range(3)]
+            for prediction, distance_frame in zip(predictions, self.distances):
+                confusion[distance_frame['label'] + 1][prediction + 1] += 1
+            for score in (score_weight_matrix(features, labels, weights), stacked_score):
+                self.assertEqual((score['good'], score['bad'], score['error']),
+                                 (good, bad, len(self.distances) - good - bad))
+                self.assertEqual(score['confusion'].tolist(), confusion)
+                for key in ('good', 'bad', 'error', 'accuracy'):
+                    self.assertEqual(score[key], scalar_score[key])
+                self.assertEqual((score['legacy']['good'], score['legacy']['bad'], score['legacy']['error']),
+                                 (legacy_good, legacy_bad, len(self.distances) - legacy_good - legacy_bad))
+
+    def test_score_without_predictions(self):
+        'Check that accuracy is zero rather than a division by zero when nothing is scored.'
+        self.assertEqual(score_weights([], [0] * len(get_config().relevant_joint_pairs))['accuracy'], 0.0)
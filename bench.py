@@ -0,0 +1,125 @@
+'''Contains a benchmark suite that times and memory-profiles each stage of the training pipeline.
+
+Run it with
+    python bench.py [frame-count [joint-count [output-file]]]
+It writes a synthetic recording, runs every stage on it and writes the
+results as JSON so runs can be compared over time.'''
+
+from multiprocessing import Process, Queue
+from Queue import Empty
+import json
+import os
+import platform
+import shutil
+import tempfile
+import traceback
+from sys import argv, stdout
+from time import time, strftime
+import numpy as np
+from anneal import (load_skeleton_data,
+                    generate_distances,
+                    KinectWeightsProblem,
+                    score_weights,
+                    score_weight_matrix)
+from config import configure, get_config
+from features import generate_distance_matrix
+from instrument import peak_rss_kb
+from normal import normalize_origin, normalize_scale
+from synthetic import KINECT_JOINTS, write_recording
+
+def _measure_in_child(function, repeat, queue):
+    start_rss = peak_rss_kb()
+    seconds = []
+    try:
+        for _ in xrange(repeat):
+            start = time()
+            function()
+            seconds.append(time() - start)
+    except Exception:
+        ## Send the error back so the parent fails instead of waiting forever.
+        queue.put((None, traceback.format_exc()))
+        return
+    queue.put((seconds, peak_rss_kb() - start_rss))
+
+def measure(function, repeat=3):
+    '''Call the function repeat times in a forked process and return its timings.
+Running each stage in its own process keeps the peak memory of one stage from
+hiding the next one's. The peak growth is measured over the first call.
+Raise RuntimeError when the function raises or the process dies.'''
+    queue = Queue()
+    process = Process(target=_measure_in_child, args=(function, repeat, queue))
+    process.start()
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=1)
+        except Empty:
+            if process.exitcode is not None and queue.empty():
+                raise RuntimeError('the benchmarked process exited with code %d' % process.exitcode)
+    process.join()
+    seconds, peak_rss_growth_kb = result
+    if seconds is None:
+        raise RuntimeError('the benchmarked function failed:\n' + peak_rss_growth_kb)
+    return {
+        'best_seconds' : min(seconds),
+        'median_seconds' : float(np.median(seconds)),
+        'repeat' : repeat,
+        'peak_rss_growth_kb' : peak_rss_growth_kb,
+    }
+
+def run_benchmarks(file_name, repeat=3):
+    'Benchmark every stage of the pipeline on the given recording and return the results.'
+    frames = load_skeleton_data(file_name)
+    normal_frames = normalize_scale(normalize_origin(frames, 'HipCenter'), 'HipCenter', 'Head')
+    features, labels = generate_distance_matrix(normal_frames)
+    problem = KinectWeightsProblem(features, labels)
+    distances = map(generate_distances, normal_frames)
+    stages = [
+        ('load_skeleton_data', len(frames), lambda: load_skeleton_data(file_name)),
+        ('normalize_origin', len(frames), lambda: normalize_origin(frames, 'HipCenter')),
+        ('normalize_scale', len(frames), lambda: normalize_scale(frames, 'HipCenter', 'Head')),
+        ('generate_distances', len(frames), lambda: map(generate_distances, normal_frames)),
+        ('generate_distance_matrix', len(frames), lambda: generate_distance_matrix(normal_frames)),
+        ('energy', len(frames), problem.energy),
+        ('score_weights', len(frames), lambda: score_weights(distances, problem.state)),
+        ('score_weight_matrix', len(frames), lambda: score_weight_matrix(features, labels, problem.state)),
+    ]
+    results = {}
+    for name, item_count, function in stages:
+        results[name] = measure(function, repeat)
+        results[name]['items'] = item_count
+        results[name]['items_per_second'] = item_count / max(results[name]['best_seconds'], 1e-9)
+    return results
+
+def benchmark_report(frame_count, joint_count=len(KINECT_JOINTS), repeat=3, seed=0):
+    'Write a synthetic recording, benchmark it and return a report.'
+    directory = tempfile.mkdtemp()
+    try:
+        file_name = os.path.join(directory, 'synthetic.csv')
+        write_recording(file_name, frame_count, joint_count, seed)
+        return {
+            'created' : strftime('%Y-%m-%dT%H:%M:%S'),
+            'python' : platform.python_version(),
+            'numpy' : np.__version__,
+            'platform' : platform.platform(),
+            'frame_count' : frame_count,
+            'joint_count' : joint_count,
+            'recording_bytes' : os.path.getsize(file_name),
+            'relevant_joint_pairs' : len(get_config().relevant_joint_pairs),
+            'stages' : run_benchmarks(file_name, repeat),
+        }
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    if 'APPDATA' not in os.environ and 'KINECT_EXPERIMENT_DIR' not in os.environ:
+        configure(kinect_experiment_dir=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                     'KinectExperiment'))
+    REPORT = benchmark_report(int(argv[1]) if len(argv) > 1 else 10000,
+                              int(argv[2]) if len(argv) > 2 else len(KINECT_JOINTS))
+    if len(argv) > 3:
+        with open(argv[3], 'w') as f_obj:
+            json.dump(REPORT, f_obj, indent=2, sort_keys=True)
+    else:
+        json.dump(REPORT, stdout, indent=2, sort_keys=True)
+        print
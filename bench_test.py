@@ -0,0 +1,35 @@
+import unittest
+import shutil
+import tempfile
+from os.path import abspath, dirname, join
+from bench import measure, run_benchmarks
+from config import configure
+from synthetic import write_recording
+
+class TestBench(unittest.TestCase):
+    def setUp(self):
+        configure(kinect_experiment_dir=join(dirname(abspath(__file__)), 'KinectExperiment'))
+        self.directory = tempfile.mkdtemp()
+    def tearDown(self):
+        configure(kinect_experiment_dir=None)
+        shutil.rmtree(self.directory)
+
+    def test_measure(self):
+        'Check the timings of a stage and that a failing stage raises rather than hangs.'
+        result = measure(lambda: sum(xrange(1000)), repeat=2)
+        self.assertEqual(result['repeat'], 2)
+        self.assertTrue(0.0 <= result['best_seconds'] <= result['median_seconds'])
+        self.assertRaises(RuntimeError, measure, lambda: 1 / 0, 1)
+
+    def test_run_benchmarks(self):
+        'Check that every stage runs once on a small recording.'
+        file_name = join(self.directory, 'synthetic.csv')
+        write_recording(file_name, 40, seed=0)
+        results = run_benchmarks(file_name, repeat=1)
+        self.assertEqual(len(results), 8)
+        for result in results.values():
+            self.assertEqual((result['repeat'], result['items']), (1, 40))
+            self.assertTrue(result['items_per_second'] > 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+'''Contains a compact binary format for skeleton recordings.
+
+A binary recording holds the positions as little-endian float32 and the labels
+as int8 in chunks of frames, each optionally compressed with zlib, followed by
+a JSON index of the joint names and the chunks. The positions of all chunks
+come first and the labels after them, so the positions and labels of an
+uncompressed recording can be memory-mapped whole. Any range of frames can be
+read by decoding only the chunks that hold it.
+
+Convert a JSON recording with
+    python binary.py file-name [binary-file-name] [--compress]
+The binary file name defaults to the file name with BINARY_SUFFIX added,
+which is where load_skeleton_data looks for it.'''
+
+from os import remove, rename
+from os.path import abspath, dirname, exists, getmtime
+import json
+import os
+import struct
+import tempfile
+import zlib
+from sys import argv
+import numpy as np
+from frames import FrameStore
+from stream import iter_skeleton_chunks
+
+BINARY_SUFFIX = '.kbin'
+MAGIC = 'KBIN'
+VERSION = 1
+## Magic, version and the offset of the JSON index.
+HEADER = struct.Struct('<4sIQ')
+POSITION_DTYPE = np.dtype('<f4')
+LABEL_DTYPE = np.dtype('i1')
+
+def binary_file_name(file_name):
+    'Return the name of the binary copy of a recording.'
+    return file_name + BINARY_SUFFIX
+
+def fresh_binary_file_name(file_name):
+    'Return the name of the binary copy of a recording if it exists and is newer than the recording, else None.'
+    binary_name = binary_file_name(file_name)
+    if exists(binary_name) and (not exists(file_name) or getmtime(binary_name) >= getmtime(file_name)):
+        return binary_name
+    return None
+
+def write_binary(file_name, stores, chunk_size=4096, compress=False):
+    '''Write FrameStores with the same joints to a binary recording.
+The stores are written one chunk of at most chunk_size frames at a time, so a
+stream of stores is never held whole. Return the number of frames written.'''
+    encode = zlib.compress if compress else lambda data: data
+    joint_names = None
+    chunks = []
+    label_data = []
+    ## Write to a temporary file first so an interrupted conversion never
+    ## leaves a binary copy that looks newer than its recording.
+    handle, temporary_name = tempfile.mkstemp(suffix='.tmp', dir=dirname(abspath(file_name)))
+    try:
+        with os.fdopen(handle, 'wb') as f_obj:
+            f_obj.write(HEADER.pack(MAGIC, VERSION, 0))
+            for store in stores:
+                if joint_names is None:
+                    joint_names = store.joint_names
+                elif store.joint_names != joint_names:
+                    raise ValueError('cannot write stores with different joints to one recording')
+                for start in xrange(0, len(store), chunk_size):
+                    chunk = store[start:start + chunk_size]
+                    data = encode(chunk.positions.astype(POSITION_DTYPE).tostring())
+                    chunks.append([len(chunk), f_obj.tell(), len(data)])
+                    f_obj.write(data)
+                    label_data.append(encode(chunk.labels.astype(LABEL_DTYPE).tostring()))
+            for chunk, data in zip(chunks, label_data):
+                chunk.extend([f_obj.tell(), len(data)])
+                f_obj.write(data)
+            index_offset = f_obj.tell()
+            json.dump({'joint_names' : joint_names or [],
+                       'frame_count' : sum(chunk[0] for chunk in chunks),
+                       'compression' : 'zlib' if compress else None,
+                       'chunks' : chunks},
+                      f_obj)
+            f_obj.seek(0)
+            f_obj.write(HEADER.pack(MAGIC, VERSION, index_offset))
+        ## mkstemp makes the file readable by its owner only, so give it the
+        ## mode open would have.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temporary_name, 0666 & ~umask)
+    except:
+        remove(temporary_name)
+        raise
+    rename(temporary_name, file_name)
+    return sum(chunk[0] for chunk in chunks)
+
+def convert_recording(file_name, binary_name=None, chunk_size=4096, compress=False):
+    'Convert a JSON recording to a binary recording, streaming it one chunk at a time.'
+    return write_binary(binary_name or binary_file_name(file_name),
+                        iter_skeleton_chunks(file_name, chunk_size), chunk_size, compress)
+
+class BinaryRecording(object):
+    '''A binary recording opened for reading.
+Positions are read as float32 and widened to float64 in the FrameStores
+returned, so they match a JSON recording to float32 precision.'''
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, 'rb') as f_obj:
+            magic, version, index_offset = HEADER.unpack(f_obj.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError('%s is not a binary recording' % (file_name,))
+            if version != VERSION:
+                raise ValueError('unsupported binary recording version %d' % (version,))
+            f_obj.seek(index_offset)
+            index = json.load(f_obj)
+        self.joint_names = [str(joint_name) for joint_name in index['joint_names']]
+        self.frame_count = index['frame_count']
+        self.compression = index['compression']
+        self.chunks = index['chunks']
+        self.chunk_starts = np.concatenate([[0], np.cumsum([chunk[0] for chunk in self.chunks])])
+
+    def __len__(self):
+        return self.frame_count
+
+    def memmap(self):
+        '''Return read-only memory maps of the (frames x joints x 3) float32 positions and the labels.
+Only uncompressed recordings can be mapped.'''
+        if self.compression:
+            raise ValueError('cannot memory-map a compressed binary recording')
+        if not self.frame_count:
+            return (np.zeros((0, len(self.joint_names), 3), dtype=POSITION_DTYPE),
+                    np.zeros(0, dtype=LABEL_DTYPE))
+        return (np.memmap(self.file_name, POSITION_DTYPE, 'r', self.chunks[0][1],
+                          (self.frame_count, len(self.joint_names), 3)),
+                np.memmap(self.file_name, LABEL_DTYPE, 'r', self.chunks[0][3], (self.frame_count,)))
+
+    def _read_chunk(self, f_obj, chunk_index):
+        frame_count, positions_offset, positions_size, labels_offset, labels_size = self.chunks[chunk_index]
+        decode = zlib.decompress if self.compression else lambda data: data
+        f_obj.seek(positions_offset)
+        positions = np.frombuffer(decode(f_obj.read(positions_size)), POSITION_DTYPE)
+        f_obj.seek(labels_offset)
+        labels = np.frombuffer(decode(f_obj.read(labels_size)), LABEL_DTYPE)
+        return positions.reshape(frame_count, len(self.joint_names), 3), labels
+
+    def read(self, start=0, stop=None):
+        'Return the frames from start up to stop as a FrameStore, decoding only the chunks that hold them.'
+        start, stop, _ = slice(start, stop).indices(self.frame_count)
+        stop = max(start, stop)
+        if not self.compression:
+            positions, labels = self.memmap()
+            return FrameStore(positions[start:stop], labels[start:stop], self.joint_names)
+        first = np.searchsorted(self.chunk_starts, start, side='right') - 1
+        last = np.searchsorted(self.chunk_starts, stop, side='left')
+        positions, labels = [], []
+        with open(self.file_name, 'rb') as f_obj:
+            for chunk_index in xrange(first, last):
+                chunk_positions, chunk_labels = self._read_chunk(f_obj, chunk_index)
+                chunk_start = self.chunk_starts[chunk_index]
+                positions.append(chunk_positions[max(start - chunk_start, 0):stop - chunk_start])
+                labels.append(chunk_labels[max(start - chunk_start, 0):stop - chunk_start])
+        if not positions:
+            return FrameStore.empty(0, self.joint_names)
+        return FrameStore(np.concatenate(positions), np.concatenate(labels), self.joint_names)
+
+    def iter_chunks(self):
+        'Yield the recording as one FrameStore per chunk.'
+        for chunk_index in xrange(len(self.chunks)):
+            yield self.read(self.chunk_starts[chunk_index], self.chunk_starts[chunk_index + 1])
+
+def iter_recording_chunks(file_name, chunk_size=4096):
+    '''Yield a recording as FrameStores, from its binary copy when that is fresh.
+The chunks of a binary copy are the ones it was written with.'''
+    binary_name = fresh_binary_file_name(file_name)
+    if binary_name is None:
+        return iter_skeleton_chunks(file_name, chunk_size)
+    return BinaryRecording(binary_name).iter_chunks()
+
+if __name__ == '__main__':
+    COMPRESS = '--compress' in argv
+    ARGUMENTS = [argument for argument in argv[1:] if argument != '--compress']
+    FRAME_COUNT = convert_recording(ARGUMENTS[0],
+                                    ARGUMENTS[1] if len(ARGUMENTS) > 1 else None,
+                                    compress=COMPRESS)
+    print 'Wrote %d frames to %s' % (FRAME_COUNT, ARGUMENTS[1] if len(ARGUMENTS) > 1
+                                     else binary_file_name(ARGUMENTS[0]))
@@ -0,0 +1,82 @@
+import unittest
+import os
+import shutil
+import stat
+import tempfile
+from os.path import join
+import numpy as np
+from anneal import load_skeleton_data
+from binary import (binary_file_name, fresh_binary_file_name, write_binary, convert_recording,
+                    BinaryRecording, iter_recording_chunks)
+from stream import iter_skeleton_chunks
+from frames import FrameStore
+from synthetic import write_recording
+
+class TestBinary(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = join(self.directory, 'labels.csv')
+        write_recording(self.file_name, 250, 12, seed=0)
+        self.frames = FrameStore.concatenate(iter_skeleton_chunks(self.file_name))
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check_store(self, store, start, stop):
+        self.assertEqual(store.joint_names, self.frames.joint_names)
+        self.assertTrue(np.array_equal(store.labels, self.frames.labels[start:stop]))
+        self.assertTrue(np.allclose(store.positions, self.frames.positions[start:stop], atol=1e-6))
+
+    def test_read_ranges(self):
+        'Check that plain and compressed recordings read back any range of frames.'
+        for compress in (False, True):
+            binary_name = join(self.directory, 'labels%d.kbin' % compress)
+            self.assertEqual(convert_recording(self.file_name, binary_name, 64, compress), 250)
+            recording = BinaryRecording(binary_name)
+            self.assertEqual(len(recording), 250)
+            self.check_store(recording.read(), 0, 250)
+            for start, stop in [(0, 64), (10, 20), (60, 130), (200, 400), (100, 100)]:
+                self.check_store(recording.read(start, stop), start, stop)
+            self.assertEqual([len(chunk) for chunk in recording.iter_chunks()], [64, 64, 64, 58])
+
+    def test_memmap(self):
+        'Check that an uncompressed recording maps its positions and labels.'
+        convert_recording(self.file_name, chunk_size=100)
+        positions, labels = BinaryRecording(binary_file_name(self.file_name)).memmap()
+        self.assertEqual(positions.dtype, np.float32)
+        self.assertTrue(np.array_equal(labels, self.frames.labels))
+        self.assertTrue(np.allclose(positions, self.frames.positions, atol=1e-6))
+
+    def test_prefer_fresh_binary(self):
+        'Check that the binary copy is read only while it is newer than the recording.'
+        self.assertEqual(fresh_binary_file_name(self.file_name), None)
+        convert_recording(self.file_name, compress=True)
+        os.utime(self.file_name, (1000, 1000))
+        self.assertEqual(fresh_binary_file_name(self.file_name), binary_file_name(self.file_name))
+        self.assertEqual(load_skeleton_data(self.file_name).positions.dtype, np.float64)
+        self.check_store(load_skeleton_data(self.file_name), 0, 250)
+        self.assertEqual(sum(len(chunk) for chunk in iter_recording_chunks(self.file_name)), 250)
+        os.utime(binary_file_name(self.file_name), (0, 0))
+        self.assertEqual(fresh_binary_file_name(self.file_name), None)
+
+    def test_file_mode(self):
+        'Check that a binary copy gets the mode of a newly created file rather than owner only.'
+        umask = os.umask(0022)
+        try:
+            convert_recording(self.file_name)
+        finally:
+            os.umask(umask)
+        self.assertEqual(stat.S_IMODE(os.stat(binary_file_name(self.file_name)).st_mode), 0644)
+
+    def test_failed_write(self):
+        'Check that a write that fails leaves no binary copy behind.'
+        def failing_stores():
+            yield self.frames[:100]
+            raise IOError('the recording was cut off')
+        binary_name = binary_file_name(self.file_name)
+        self.assertRaises(IOError, write_binary, binary_name, failing_stores())
+        self.assertEqual(os.listdir(self.directory), ['labels.csv'])
+        self.assertEqual(fresh_binary_file_name(self.file_name), None)
+        self.check_store(load_skeleton_data(self.file_name), 0, 250)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+'''Contains an on-disk cache of the distance features of recordings.
+
+An entry is keyed by a hash of the content of the file the features are read
+from, the recording or its fresh binary copy, along with which of the two it
+is, the normalization joints, the joint pairs and the code version, a hash of the source files
+that turn recordings into features. Changing any of them changes the key, so
+a stale entry is never served. The cache holds at most max_bytes of entries
+and evicts the least recently used ones first.'''
+
+from os import listdir, remove, rename, utime
+from os.path import abspath, dirname, exists, getmtime, getsize, join
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from zipfile import BadZipfile
+import numpy as np
+from binary import fresh_binary_file_name, iter_recording_chunks
+from config import get_config
+from features import generate_distance_matrix
+from instrument import current as current_instrumentation
+from normal import normalize_origin, normalize_scale
+
+## The modules whose code decides the features of a recording.
+CODE_FILES = ('frames.py', 'stream.py', 'binary.py', 'normal.py', 'features.py', 'cache.py')
+CACHE_SUFFIX = '.npz'
+
+def file_digest(file_name, block_size=1 << 20):
+    'Return the SHA-1 hex digest of the content of a file.'
+    digest = hashlib.sha1()
+    with open(file_name, 'rb') as f_obj:
+        for block in iter(lambda: f_obj.read(block_size), ''):
+            digest.update(block)
+    return digest.hexdigest()
+
+_code_version = None
+
+def code_version():
+    'Return a hash of the source files in CODE_FILES, computed once per process.'
+    global _code_version
+    if _code_version is None:
+        source_dir = dirname(abspath(__file__))
+        digest = hashlib.sha1()
+        for code_file in CODE_FILES:
+            digest.update(code_file)
+            digest.update(file_digest(join(source_dir, code_file)))
+        _code_version = digest.hexdigest()
+    return _code_version
+
+def feature_key(file_name, center_joint, scale_joints, joint_pairs):
+    '''Return the cache key of the distance features of a recording.
+The recording is hashed from the file iter_recording_chunks reads, so a binary
+copy without its JSON recording has a key and the float32 positions of a
+binary copy never share a key with the float64 positions of the JSON.'''
+    binary_name = fresh_binary_file_name(file_name)
+    return hashlib.sha1(json.dumps({
+        'source' : 'json' if binary_name is None else 'binary',
+        'recording' : file_digest(binary_name or file_name),
+        'center_joint' : center_joint,
+        'scale_joints' : list(scale_joints),
+        'joint_pairs' : [list(joint_pair) for joint_pair in joint_pairs],
+        'code_version' : code_version(),
+    }, sort_keys=True)).hexdigest()
+
+class FeatureCache(object):
+    '''Feature matrices and label vectors stored as .npz files in a directory.
+Reading an entry touches its file, so file times order the entries from least
+to most recently used.'''
+    def __init__(self, directory, max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        if not exists(directory):
+            os.makedirs(directory)
+
+    def path(self, key):
+        'Return the file name of an entry.'
+        return join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, key):
+        '''Return the (features, labels) of an entry, or None when it is not cached.
+An entry that cannot be read, such as a truncated file, is removed.'''
+        try:
+            with np.load(self.path(key)) as entry:
+                features, labels = entry['features'], entry['labels']
+        except (IOError, ValueError, KeyError, EOFError, BadZipfile, zlib.error):
+            try:
+                remove(self.path(key))
+            except OSError:
+                pass
+            return None
+        utime(self.path(key), None)
+        return features, labels
+
+    def put(self, key, features, labels):
+        'Store an entry and evict the least recently used entries past the size limit.'
+        ## Write to a temporary file first so readers never see half an entry.
+        handle, temporary_name = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(handle, 'wb') as f_obj:
+                np.savez(f_obj, features=features, labels=labels)
+            rename(temporary_name, self.path(key))
+        except:
+            remove(temporary_name)
+            raise
+        self.evict()
+
+    def evict(self):
+        'Remove the least recently used entries until the cache fits its size limit.'
+        entries = []
+        for file_name in listdir(self.directory):
+            if file_name.endswith(CACHE_SUFFIX):
+                path = join(self.directory, file_name)
+                try:
+                    entries.append((getmtime(path), getsize(path), path))
+                except OSError:
+                    pass
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                remove(path)
+            except OSError:
+                pass
+            total_bytes -= size
+
+def recording_distance_matrix(file_name, center_joint='HipCenter', scale_joints=('HipCenter', 'Head'),
+                              joint_pairs=None):
+    '''Return the distance matrix and label vector of a recording.
+The recording is streamed in chunks, each normalized and featurized in place.'''
+    instrumentation = current_instrumentation()
+    feature_chunks, label_chunks = [], []
+    chunks = iter_recording_chunks(file_name)
+    while True:
+        with instrumentation.stage('load') as stage:
+            chunk = next(chunks, None)
+            stage['items'] = len(chunk) if chunk is not None else 0
+        if chunk is None:
+            break
+        with instrumentation.stage('normalize', len(chunk)):
+            frames = normalize_scale(normalize_origin(chunk, center_joint, in_place=True),
+                                     scale_joints[0], scale_joints[1], in_place=True)
+        with instrumentation.stage('featurize', len(chunk)):
+            features, labels = generate_distance_matrix(frames, joint_pairs)
+            feature_chunks.append(features)
+            label_chunks.append(labels)
+    if not feature_chunks:
+        pairs = joint_pairs if joint_pairs is not None else get_config().relevant_joint_pairs
+        return np.zeros((0, len(pairs))), np.zeros(0, dtype=np.int8)
+    return np.concatenate(feature_chunks), np.concatenate(label_chunks)
+
+def cached_distance_matrix(file_name, cache, center_joint='HipCenter', scale_joints=('HipCenter', 'Head'),
+                           joint_pairs=None):
+    'Return the distance matrix and label vector of a recording from the cache, computing and storing them on a miss.'
+    if joint_pairs is None:
+        joint_pairs = get_config().relevant_joint_pairs
+    with current_instrumentation().stage('feature_cache'):
+        key = feature_key(file_name, center_joint, scale_joints, joint_pairs)
+        entry = cache.get(key)
+    if entry is not None:
+        return entry
+    features, labels = recording_distance_matrix(file_name, center_joint, scale_joints, joint_pairs)
+    cache.put(key, features, labels)
+    return features, labels
@@ -0,0 +1,94 @@
+import unittest
+import os
+import shutil
+import tempfile
+from os.path import abspath, dirname, exists, join
+import numpy as np
+from binary import binary_file_name, convert_recording
+from cache import FeatureCache, feature_key, cached_distance_matrix, recording_distance_matrix
+from config import configure, get_config
+from synthetic import write_recording
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        configure(kinect_experiment_dir=join(dirname(abspath(__file__)), 'KinectExperiment'))
+        self.directory = tempfile.mkdtemp()
+        self.file_name = join(self.directory, 'labels.csv')
+        write_recording(self.file_name, 120, seed=0)
+        self.cache = FeatureCache(join(self.directory, 'cache'))
+    def tearDown(self):
+        configure(kinect_experiment_dir=None)
+        shutil.rmtree(self.directory)
+
+    def test_hit_and_miss(self):
+        'Check that a cached entry matches the computed features and changes with its inputs.'
+        features, labels = recording_distance_matrix(self.file_name)
+        cached_features, cached_labels = cached_distance_matrix(self.file_name, self.cache)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 1)
+        cached_features, cached_labels = cached_distance_matrix(self.file_name, self.cache)
+        self.assertTrue(np.array_equal(cached_features, features))
+        self.assertTrue(np.array_equal(cached_labels, labels))
+        cached_distance_matrix(self.file_name, self.cache, scale_joints=('HipCenter', 'KneeLeft'))
+        self.assertEqual(len(os.listdir(self.cache.directory)), 2)
+        write_recording(self.file_name, 120, seed=1)
+        changed_features, _ = cached_distance_matrix(self.file_name, self.cache)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 3)
+        self.assertFalse(np.array_equal(changed_features, features))
+
+    def test_binary_source(self):
+        'Check that a binary copy is keyed by its own content, with or without its recording.'
+        key_args = ('HipCenter', ('HipCenter', 'Head'), get_config().relevant_joint_pairs)
+        json_key = feature_key(self.file_name, *key_args)
+        convert_recording(self.file_name)
+        os.utime(self.file_name, (1000, 1000))
+        binary_key = feature_key(self.file_name, *key_args)
+        self.assertNotEqual(binary_key, json_key)
+        os.remove(self.file_name)
+        self.assertEqual(feature_key(self.file_name, *key_args), binary_key)
+        features, labels = cached_distance_matrix(self.file_name, self.cache)
+        self.assertEqual(len(labels), 120)
+        self.assertTrue(exists(self.cache.path(binary_key)))
+        expected_features, expected_labels = recording_distance_matrix(self.file_name)
+        self.assertTrue(np.array_equal(features, expected_features))
+        self.assertTrue(np.array_equal(labels, expected_labels))
+        os.remove(binary_file_name(self.file_name))
+        self.assertRaises(IOError, feature_key, self.file_name, *key_args)
+
+    def test_evict_least_recently_used(self):
+        'Check that the entries read least recently are evicted first.'
+        cache = FeatureCache(join(self.directory, 'small'), max_bytes=1 << 20)
+        for i, key in enumerate(['a', 'b', 'c']):
+            cache.put(key, np.zeros((10, 3)), np.zeros(10, dtype=np.int8))
+            os.utime(cache.path(key), (1000 + i, 1000 + i))
+        cache.get('a')
+        cache.max_bytes = 2 * os.path.getsize(cache.path('a'))
+        cache.evict()
+        self.assertEqual([exists(cache.path(key)) for key in 'abc'], [True, False, True])
+        self.assertEqual(cache.get('b'), None)
+
+    def test_corrupt_entry(self):
+        'Check that unreadable entries are removed and recomputed.'
+        features, labels = cached_distance_matrix(self.file_name, self.cache)
+        key = feature_key(self.file_name, 'HipCenter', ('HipCenter', 'Head'), get_config().relevant_joint_pairs)
+        with open(self.cache.path(key), 'rb') as f_obj:
+            content = f_obj.read()
+        for damaged in (content[:len(content) // 2], 'not an entry', content.replace('features', 'fEatures')):
+            with open(self.cache.path(key), 'wb') as f_obj:
+                f_obj.write(damaged)
+            self.assertEqual(self.cache.get(key), None)
+            self.assertFalse(exists(self.cache.path(key)))
+        cached_features, cached_labels = cached_distance_matrix(self.file_name, self.cache)
+        self.assertTrue(np.array_equal(cached_features, features))
+        self.assertTrue(np.array_equal(cached_labels, labels))
+        self.assertNotEqual(self.cache.get(key), None)
+
+    def test_failed_put(self):
+        'Check that a write that fails leaves no temporary file behind.'
+        class Unsaveable(object):
+            def __array__(self, *_):
+                raise ValueError('cannot save')
+        self.assertRaises(ValueError, self.cache.put, 'a', Unsaveable(), np.zeros(3))
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+'''Contains a catalog of the recording sessions in the experiment directory.
+
+Every subdirectory of the experiment directory holding a recording is one
+session. The catalog loads the recordings of many sessions in a process pool
+and merges them into one FrameStore that remembers which session every frame
+came from.'''
+
+from fnmatch import fnmatch
+from multiprocessing import Pool
+from os import listdir
+from os.path import isdir, isfile, join
+import numpy as np
+from anneal import load_skeleton_data
+from binary import BINARY_SUFFIX
+from config import get_config
+from frames import FrameStore
+
+## The recordings are JSON arrays of frames saved with a .csv extension.
+RECORDING_PATTERN = '*.csv'
+
+def scan_sessions(kinect_experiment_dir=None, pattern=RECORDING_PATTERN):
+    '''Return (session name, recording file names) for every session directory.
+A session directory is a subdirectory of the experiment directory, which
+defaults to the one of the config, holding files matching the pattern. Hidden
+files such as .DS_Store are skipped and binary copies are not listed since
+load_skeleton_data reads them in place of their recordings. The sessions and their recordings are sorted by name.'''
+    if kinect_experiment_dir is None:
+        kinect_experiment_dir = get_config().kinect_experiment_dir
+    sessions = []
+    for session_name in sorted(listdir(kinect_experiment_dir)):
+        session_dir = join(kinect_experiment_dir, session_name)
+        if not isdir(session_dir):
+            continue
+        file_names = [join(session_dir, file_name) for file_name in sorted(listdir(session_dir))
+                      if fnmatch(file_name, pattern) and not file_name.startswith('.')
+                      and not file_name.endswith(BINARY_SUFFIX)
+                      and isfile(join(session_dir, file_name))]
+        if file_names:
+            sessions.append((session_name, file_names))
+    return sessions
+
+def _load_session(file_names):
+    return FrameStore.concatenate([load_skeleton_data(file_name) for file_name in file_names])
+
+def select_joints(store, joint_names):
+    'Return a store holding only the given joints of a store, in the given order.'
+    if store.joint_names == list(joint_names):
+        return store
+    return FrameStore(store.positions[:, store.joint_columns(joint_names)],
+                      store.labels, joint_names)
+
+class SessionCatalog(object):
+    '''The frames of many sessions held in one FrameStore.
+The frames of every session are contiguous, session_ids holds the session of
+every frame and session_names the name of every session id.'''
+    def __init__(self, frames, session_ids, session_names):
+        self.frames = frames
+        self.session_ids = np.ascontiguousarray(session_ids, dtype=np.intp)
+        self.session_names = list(session_names)
+        self.session_index = {session_name : session_id
+                              for session_id, session_name in enumerate(self.session_names)}
+        if self.session_ids.shape != (len(frames),):
+            raise ValueError('expected %d session ids, not %d'
+                             % (len(frames), len(self.session_ids)))
+        if len(self.session_ids) and np.any(np.diff(self.session_ids) < 0):
+            raise ValueError('the frames of every session must be contiguous and in session order')
+        counts = np.bincount(self.session_ids, minlength=len(self.session_names))
+        self.session_starts = np.concatenate([[0], np.cumsum(counts)])
+
+    @classmethod
+    def from_stores(cls, named_stores, joint_names=None):
+        '''Merge (session name, FrameStore) pairs into one catalog.
+The joints default to the joints every session has.'''
+        named_stores = list(named_stores)
+        if joint_names is None:
+            joint_sets = [set(store.joint_names) for _, store in named_stores]
+            joint_names = sorted(set.intersection(*joint_sets)) if joint_sets else []
+        stores = [select_joints(store, joint_names) for _, store in named_stores]
+        return cls(FrameStore.concatenate(stores, joint_names),
+                   np.repeat(np.arange(len(stores)), [len(store) for store in stores]),
+                   [session_name for session_name, _ in named_stores])
+
+    @classmethod
+    def load(cls, sessions=None, processes=None, joint_names=None, pattern=RECORDING_PATTERN):
+        '''Load the given (session name, recording file names) pairs in a process pool.
+The sessions default to every session scan_sessions finds.'''
+        if sessions is None:
+            sessions = scan_sessions(pattern=pattern)
+        pool = Pool(processes)
+        try:
+            stores = pool.map(_load_session, [file_names for _, file_names in sessions],
+                              chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+        return cls.from_stores(zip([session_name for session_name, _ in sessions], stores),
+                               joint_names)
+
+    def session_indices(self, session_name):
+        'Return the indices of the frames of a session.'
+        session_id = self.session_index[session_name]
+        return np.arange(self.session_starts[session_id], self.session_starts[session_id + 1])
+
+    def session_frames(self, session_name):
+        'Return a store viewing the frames of a session without copying them.'
+        session_id = self.session_index[session_name]
+        return self.frames[self.session_starts[session_id]:self.session_starts[session_id + 1]]
+
+    def select(self, session_names):
+        'Return a catalog holding copies of the frames of the given sessions.'
+        session_names = list(session_names)
+        indices = np.concatenate([self.session_indices(session_name)
+                                  for session_name in session_names] or [np.zeros(0, np.intp)])
+        counts = [len(self.session_indices(session_name)) for session_name in session_names]
+        return SessionCatalog(self.frames.take(indices),
+                              np.repeat(np.arange(len(session_names)), counts),
+                              session_names)
+
+    def leave_one_session_out_splits(self):
+        '''Return (training indices, testing indices) for every session, testing
+on the frames of that session and training on the frames of all the others.'''
+        all_indices = np.arange(len(self.frames))
+        return [(np.concatenate([all_indices[:self.session_starts[session_id]],
+                                 all_indices[self.session_starts[session_id + 1]:]]),
+                 all_indices[self.session_starts[session_id]:self.session_starts[session_id + 1]])
+                for session_id in xrange(len(self.session_names))]
+
+    def __len__(self):
+        return len(self.frames)
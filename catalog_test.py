@@ -0,0 +1,66 @@
+import unittest
+import os
+import shutil
+import tempfile
+from os.path import join
+import numpy as np
+from anneal import load_skeleton_data
+from catalog import scan_sessions, SessionCatalog
+from synthetic import write_recording
+
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        ## Write three synthetic sessions, one with fewer joints, and stray files.
+        self.directory = tempfile.mkdtemp()
+        self.recordings = {}
+        for session_name, frame_count, joint_count in [('b_session', 30, 12),
+                                                       ('a_session', 20, 10),
+                                                       ('c_session', 25, 12)]:
+            os.mkdir(join(self.directory, session_name))
+            file_name = join(self.directory, session_name, 'labels.csv')
+            write_recording(file_name, frame_count, joint_count, seed=frame_count)
+            self.recordings[session_name] = file_name
+        for stray_name in ['.DS_Store', 'notes.txt', '.labels.csv']:
+            with open(join(self.directory, 'a_session', stray_name), 'w') as f_obj:
+                f_obj.write('not a recording')
+        with open(join(self.directory, 'RelevantJoints.json'), 'w') as f_obj:
+            f_obj.write('[]')
+        self.catalog = SessionCatalog.load(scan_sessions(self.directory), processes=2)
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_scan_sessions(self):
+        'Check that every session directory is found in name order.'
+        self.assertEqual(scan_sessions(self.directory),
+                         [(session_name, [self.recordings[session_name]])
+                          for session_name in ['a_session', 'b_session', 'c_session']])
+
+    def test_load(self):
+        'Check that the sessions are merged in order over the joints they share.'
+        self.assertEqual(len(self.catalog), 75)
+        self.assertEqual(len(self.catalog.frames.joint_names), 10)
+        self.assertEqual(self.catalog.session_ids.tolist(), [0] * 20 + [1] * 30 + [2] * 25)
+        session = load_skeleton_data(self.recordings['b_session'])
+        frames = self.catalog.session_frames('b_session')
+        self.assertTrue(np.array_equal(frames.labels, session.labels))
+        self.assertTrue(np.array_equal(frames.positions,
+                                       session.positions[:, session.joint_columns(frames.joint_names)]))
+
+    def test_leave_one_session_out_splits(self):
+        'Check that every split tests on one whole session and trains on the others.'
+        splits = self.catalog.leave_one_session_out_splits()
+        self.assertEqual(len(splits), 3)
+        for session_name, (training, testing) in zip(self.catalog.session_names, splits):
+            self.assertTrue(np.array_equal(testing, self.catalog.session_indices(session_name)))
+            self.assertEqual(sorted(np.concatenate([training, testing]).tolist()), range(75))
+
+    def test_select(self):
+        'Check that a selection holds the chosen sessions in the chosen order.'
+        selection = self.catalog.select(['c_session', 'a_session'])
+        self.assertEqual(selection.session_names, ['c_session', 'a_session'])
+        self.assertEqual(len(selection), 45)
+        self.assertTrue(np.array_equal(selection.session_frames('a_session').positions,
+                                       self.catalog.session_frames('a_session').positions))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+'''Contains a weighted centroid classifier for frames of skeleton data.'''
+
+import json
+from random import uniform
+import numpy as np
+from simanneal import Annealer
+from anneal import tweak, accuracy
+
+def squared_deviations(positions, centroid):
+    'Return the (frames x joints) squared distances of every joint to its position in the centroid.'
+    differences = positions - centroid
+    return np.einsum('ijk,ijk->ij', differences, differences)
+
+def pivot_score(scores, labels):
+    'Return the score halfway between the mean score of the Yes frames and of the No frames.'
+    yes_scores, no_scores = scores[labels == 1], scores[labels == -1]
+    if not len(yes_scores) or not len(no_scores):
+        raise ValueError('the pivot needs at least one Yes frame and one No frame')
+    return (yes_scores.mean() + no_scores.mean()) / 2
+
+def score_predictions(scores, labels, pivot):
+    '''Score frames scored below the pivot as Yes and above it as No.
+Frames labeled Null cannot be right or wrong and count as errors.'''
+    good_score = int(np.sum(((labels == 1) & (scores < pivot)) | ((labels == -1) & (scores > pivot))))
+    bad_score = int(np.sum(((labels == 1) & (scores > pivot)) | ((labels == -1) & (scores < pivot))))
+    return {
+        'good' : good_score,
+        'bad' : bad_score,
+        'error' : len(labels) - good_score - bad_score,
+        'accuracy' : accuracy(good_score, bad_score)
+    }
+
+class CentroidWeightsProblem(Annealer):
+    '''A class with methods defined for generating joint weights for a WeightedCentroidModel.
+The energy is the share of Yes and No frames the weights classify wrongly.'''
+    copy_strategy = 'slice'
+    def __init__(self, deviations, labels):
+        self.deviations = deviations
+        self.labels = labels
+        self.state = [uniform(0.0, 0.5) for _ in xrange(deviations.shape[1])]
+    def move(self):
+        self.state = [abs(tweak(weight)) for weight in self.state]
+    def energy(self):
+        scores = np.dot(self.deviations, self.state)
+        scores = score_predictions(scores, self.labels, pivot_score(scores, self.labels))
+        return 1.0 - scores['accuracy']
+
+class WeightedCentroidModel(object):
+    '''A classifier that scores a frame by the weighted squared distance of its
+joints to the centroid of the Yes frames. Frames scoring below the pivot are
+labeled Yes (1) and the others No (-1).'''
+    def __init__(self, joint_names, centroid=None, weights=None, pivot=None):
+        self.joint_names = list(joint_names)
+        self.centroid = None if centroid is None else np.asarray(centroid, dtype=np.float64)
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+        self.pivot = pivot
+
+    def _positions(self, frames):
+        'Return the positions of a FrameStore with the joints in the order of the model.'
+        return frames.positions[:, frames.joint_columns(self.joint_names)]
+
+    def fit(self, frames, weights=None):
+        '''Fit the centroid to the Yes frames of a FrameStore, anneal the joint
+weights unless they are given and place the pivot between the mean scores.'''
+        positions = self._positions(frames)
+        labels = frames.labels
+        if not np.any(labels == 1) or not np.any(labels == -1):
+            raise ValueError('fitting needs at least one Yes frame and one No frame')
+        self.centroid = positions[labels == 1].mean(axis=0)
+        deviations = squared_deviations(positions, self.centroid)
+        if weights is None:
+            weights, _ = CentroidWeightsProblem(deviations, labels).anneal()
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.pivot = float(pivot_score(np.dot(deviations, self.weights), labels))
+        return self
+
+    def decision_function(self, frames):
+        'Return the weighted squared distance of every frame of a FrameStore to the centroid.'
+        return np.dot(squared_deviations(self._positions(frames), self.centroid), self.weights)
+
+    def predict(self, frames):
+        'Return the predicted label of every frame of a FrameStore.'
+        return np.where(self.decision_function(frames) < self.pivot, 1, -1).astype(np.int8)
+
+    def score(self, frames):
+        'Score the model on a FrameStore and return score data.'
+        return score_predictions(self.decision_function(frames), frames.labels, self.pivot)
+
+    def save(self, file_name):
+        'Save the model to a JSON file.'
+        with open(file_name, 'w') as f_obj:
+            json.dump({
+                'joint_names' : self.joint_names,
+                'centroid' : self.centroid.tolist(),
+                'weights' : self.weights.tolist(),
+                'pivot' : self.pivot,
+            }, f_obj)
+
+    @classmethod
+    def load(cls, file_name):
+        'Load a model saved with save.'
+        with open(file_name) as f_obj:
+            model_info = json.load(f_obj)
+        return cls(model_info['joint_names'], model_info['centroid'],
+                   model_info['weights'], model_info['pivot'])
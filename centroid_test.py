@@ -0,0 +1,95 @@
+import unittest
+import random
+import shutil
+import tempfile
+from os.path import join
+import numpy as np
+from centroid import (squared_deviations, pivot_score, score_predictions,
+                      CentroidWeightsProblem, WeightedCentroidModel)
+from frames import FrameStore
+
+JOINTS = ['Head', 'HipCenter', 'KneeLeft']
+
+class TestCentroid(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.frames = FrameStore.from_frames([
+            {'jointPositions' : {'jointPositionDict' : {
+                joint : [random.uniform(-1, 1) for _ in range(3)] for joint in JOINTS}},
+             'label' : label}
+            for label in [1, -1, 0] * 10])
+        self.directory = tempfile.mkdtemp()
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_centroid(self):
+        'Check the centroid and squared deviations against loops over the frames.'
+        weights = [0.2, 0.3, 0.5]
+        model = WeightedCentroidModel(JOINTS).fit(self.frames, weights)
+        yes_frames = [frame['jointPositions']['jointPositionDict']
+                      for frame in self.frames if frame['label'] == 1]
+        for column, joint in enumerate(JOINTS):
+            for axis in range(3):
+                self.assertAlmostEqual(model.centroid[column, axis],
+                                       sum(joint_dict[joint][axis] for joint_dict in yes_frames) / len(yes_frames))
+        deviations = squared_deviations(self.frames.positions, model.centroid)
+        for row, frame in enumerate(self.frames):
+            joint_dict = frame['jointPositions']['jointPositionDict']
+            for column, joint in enumerate(JOINTS):
+                self.assertAlmostEqual(deviations[row, column],
+                                       sum((joint_dict[joint][axis] - model.centroid[column, axis]) ** 2
+                                           for axis in range(3)))
+        self.assertTrue(np.allclose(model.decision_function(self.frames), np.dot(deviations, weights)))
+
+    def test_pivot_and_scores(self):
+        'Check the pivot and that Null frames count as errors.'
+        scores = np.array([1.0, 3.0, 5.0, 9.0, 2.0, 4.0])
+        labels = np.array([1, 1, -1, -1, 0, -1])
+        self.assertEqual(pivot_score(scores, labels), (2.0 + 6.0) / 2)
+        self.assertEqual(score_predictions(scores, labels, 4.0),
+                         {'good' : 4, 'bad' : 0, 'error' : 2, 'accuracy' : 1.0})
+        self.assertEqual(score_predictions(scores, labels, 6.0),
+                         {'good' : 3, 'bad' : 2, 'error' : 1, 'accuracy' : 0.6})
+        self.assertRaises(ValueError, pivot_score, scores, np.array([1, 1, 0, 0, 0, 1]))
+        self.assertRaises(ValueError, pivot_score, scores, np.array([-1, -1, 0, 0, 0, -1]))
+
+    def test_energy(self):
+        'Check that the annealing energy is the error rate over the Yes and No frames.'
+        model = WeightedCentroidModel(JOINTS).fit(self.frames, [1.0, 1.0, 1.0])
+        deviations = squared_deviations(self.frames.positions, model.centroid)
+        problem = CentroidWeightsProblem(deviations, self.frames.labels)
+        scores = np.dot(deviations, problem.state)
+        expected = score_predictions(scores, self.frames.labels, pivot_score(scores, self.frames.labels))
+        self.assertEqual(problem.energy(), 1.0 - expected['accuracy'])
+
+    def test_predict(self):
+        'Check that frames scoring below the pivot are predicted Yes and the others No.'
+        model = WeightedCentroidModel(JOINTS).fit(self.frames, [0.2, 0.3, 0.5])
+        scores = model.decision_function(self.frames)
+        predictions = model.predict(self.frames)
+        self.assertEqual(predictions.tolist(), [1 if score < model.pivot else -1 for score in scores])
+        self.assertEqual(model.score(self.frames),
+                         score_predictions(scores, self.frames.labels, model.pivot))
+
+    def test_save_and_load(self):
+        'Check that a loaded model predicts like the saved one.'
+        model = WeightedCentroidModel(JOINTS)
+        model.fit(self.frames.take(np.arange(6)), [0.2, 0.3, 0.5])
+        file_name = join(self.directory, 'model.json')
+        model.save(file_name)
+        loaded = WeightedCentroidModel.load(file_name)
+        self.assertEqual(loaded.joint_names, JOINTS)
+        self.assertTrue(np.array_equal(loaded.centroid, model.centroid))
+        self.assertTrue(np.array_equal(loaded.weights, model.weights))
+        self.assertEqual(loaded.pivot, model.pivot)
+        self.assertTrue(np.array_equal(loaded.predict(self.frames), model.predict(self.frames)))
+
+    def test_fit_without_both_labels(self):
+        'Check that fitting refuses frames without both Yes and No frames.'
+        no_frames = self.frames.take(np.flatnonzero(self.frames.labels != 1))
+        self.assertRaises(ValueError, WeightedCentroidModel(JOINTS).fit, no_frames, [1.0, 1.0, 1.0])
+        yes_frames = self.frames.take(np.flatnonzero(self.frames.labels != -1))
+        self.assertRaises(ValueError, WeightedCentroidModel(JOINTS).fit, yes_frames, [1.0, 1.0, 1.0])
+
+if __name__ == '__main__':
+    unittest.main()
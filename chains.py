@@ -0,0 +1,129 @@
+'''Contains runners that anneal several KinectWeightsProblem chains in a process pool.'''
+
+from multiprocessing import Pool
+import math
+import random
+from anneal import KinectWeightsProblem
+
+## Training data for the chains run by a worker process. It is set once per
+## worker by the pool initializer rather than pickled with every chain.
+_SHARED = {}
+
+def _share_training_data(features, labels, options):
+    'Keep the training data of the pool in this worker process.'
+    _SHARED['features'] = features
+    _SHARED['labels'] = labels
+    _SHARED['options'] = options
+
+class TracedWeightsProblem(KinectWeightsProblem):
+    'A KinectWeightsProblem that records (step, temperature, energy) at every update instead of printing it.'
+    def __init__(self, joint_data, labels=None, **options):
+        KinectWeightsProblem.__init__(self, joint_data, labels, **options)
+        self.trace = []
+    def update(self, step, T, E, acceptance, improvement):
+        self.trace.append((step, T, E))
+    def sample(self, T, steps):
+        '''Run the Metropolis algorithm at the fixed temperature T for the given steps.
+Return the final state and energy and the best state and energy seen.'''
+        E = self.energy()
+        prevState = self.copy_state(self.state)
+        best_state, best_energy = prevState, E
+        for _ in xrange(steps):
+            dE = self.move()
+            if dE is None:
+                dE = self.energy() - E
+            if dE > 0.0 and math.exp(-dE / T) < random.random():
+                self.state = self.copy_state(prevState)
+            else:
+                E += dE
+                prevState = self.copy_state(self.state)
+                if E < best_energy:
+                    best_state, best_energy = prevState, E
+        return self.state, E, best_state, best_energy
+
+def _new_problem(schedule):
+    problem = TracedWeightsProblem(_SHARED['features'], _SHARED['labels'], **_SHARED['options'])
+    if schedule is not None:
+        problem.set_schedule(schedule)
+    return problem
+
+def _run_chain(args):
+    chain_seed, schedule = args
+    random.seed(chain_seed)
+    problem = _new_problem(schedule)
+    weights, energy = problem.anneal()
+    return {'seed' : chain_seed, 'weights' : weights, 'energy' : energy, 'trace' : problem.trace}
+
+def _run_replica(args):
+    replica_seed, state, T, steps = args
+    random.seed(replica_seed)
+    problem = _new_problem(None)
+    if state is not None:
+        problem.state = state
+    return problem.sample(T, steps)
+
+def _pool(features, labels, options, processes):
+    return Pool(processes, _share_training_data, (features, labels, options))
+
+def anneal_chains(features, labels, seeds, processes=None, schedule=None, **options):
+    '''Anneal one independent chain per seed in a process pool.
+The options are passed to every KinectWeightsProblem and schedule, if given,
+is a dictionary like the one Annealer.auto returns.
+Return the best weights, their energy and a list of per-chain results holding
+the seed, weights, energy and energy trace of every chain.'''
+    pool = _pool(features, labels, options, processes)
+    try:
+        chains = pool.map(_run_chain, [(chain_seed, schedule) for chain_seed in seeds], chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    best = min(chains, key=lambda chain: chain['energy'])
+    return best['weights'], best['energy'], chains
+
+def temperature_ladder(tmin, tmax, count):
+    'Return count temperatures spaced geometrically from tmin to tmax.'
+    if count == 1:
+        return [float(tmin)]
+    ratio = (float(tmax) / tmin) ** (1.0 / (count - 1))
+    return [tmin * ratio ** i for i in xrange(count)]
+
+def exchange_replicas(states, energies, temperatures, offset, rng):
+    '''Swap the states and energies of the neighbouring temperatures i and i + 1
+for i = offset, offset + 2, ... in place with the replica exchange criterion.'''
+    for i in xrange(offset, len(temperatures) - 1, 2):
+        delta = (energies[i] - energies[i + 1]) * (1.0 / temperatures[i] - 1.0 / temperatures[i + 1])
+        if delta >= 0 or rng.random() < math.exp(delta):
+            states[i], states[i + 1] = states[i + 1], states[i]
+            energies[i], energies[i + 1] = energies[i + 1], energies[i]
+
+def replica_exchange(features, labels, temperatures, rounds, steps_per_round,
+                     seed=None, processes=None, **options):
+    '''Run one replica per temperature in a process pool and swap the states of
+neighbouring temperatures between rounds with the replica exchange criterion.
+Return the best weights, their energy and a list of per-replica results holding
+the temperature and the energy trace of every replica, one entry per round.'''
+    rng = random.Random(seed)
+    states = [None] * len(temperatures)
+    traces = [[] for _ in temperatures]
+    best_weights, best_energy = None, float('inf')
+    pool = _pool(features, labels, options, processes)
+    try:
+        for round_number in xrange(rounds):
+            results = pool.map(_run_replica,
+                               [(rng.random(), state, T, steps_per_round)
+                                for state, T in zip(states, temperatures)],
+                               chunksize=1)
+            states = [state for state, _, _, _ in results]
+            energies = [energy for _, energy, _, _ in results]
+            for trace, energy in zip(traces, energies):
+                trace.append((round_number, energy))
+            for _, _, state, energy in results:
+                if energy < best_energy:
+                    best_weights, best_energy = state, energy
+            ## Alternate between even and odd neighbour pairs every round.
+            exchange_replicas(states, energies, temperatures, round_number % 2, rng)
+    finally:
+        pool.close()
+        pool.join()
+    replicas = [{'temperature' : T, 'trace' : trace} for T, trace in zip(temperatures, traces)]
+    return best_weights, best_energy, replicas
@@ -0,0 +1,87 @@
+import unittest
+import random
+import numpy as np
+from anneal import KinectWeightsProblem
+from chains import (TracedWeightsProblem, anneal_chains, temperature_ladder,
+                    exchange_replicas, replica_exchange)
+
+SCHEDULE = {'tmax' : 50.0, 'tmin' : 0.5, 'steps' : 300, 'updates' : 10}
+
+class TestChains(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.features = rng.uniform(0, 2, (60, 5))
+        self.labels = rng.randint(-1, 2, 60).astype(np.float64)
+
+    def energy(self, weights):
+        problem = KinectWeightsProblem(self.features, self.labels)
+        problem.state = list(weights)
+        return problem.energy()
+
+    def test_anneal_chains(self):
+        'Check that the best chain is returned and the same seeds give the same chains.'
+        seeds = [1, 2, 3]
+        weights, energy, chains = anneal_chains(self.features, self.labels, seeds,
+                                                processes=2, schedule=SCHEDULE)
+        self.assertEqual([chain['seed'] for chain in chains], seeds)
+        self.assertEqual(energy, min(chain['energy'] for chain in chains))
+        self.assertEqual(weights, min(chains, key=lambda chain: chain['energy'])['weights'])
+        self.assertAlmostEqual(energy, self.energy(weights), places=9)
+        for chain in chains:
+            self.assertTrue(len(chain['trace']) > 0)
+        _, _, repeated_chains = anneal_chains(self.features, self.labels, seeds,
+                                              processes=1, schedule=SCHEDULE)
+        self.assertEqual([chain['weights'] for chain in repeated_chains],
+                         [chain['weights'] for chain in chains])
+
+    def test_sample(self):
+        'Check that sampling keeps the energies it returns paired with their states.'
+        for move_strategy in ('all', 'block'):
+            random.seed(0)
+            problem = TracedWeightsProblem(self.features, self.labels,
+                                           move_strategy=move_strategy, block_size=2)
+            state, energy, best_state, best_energy = problem.sample(5.0, 200)
+            self.assertAlmostEqual(energy, self.energy(state), places=6)
+            self.assertAlmostEqual(best_energy, self.energy(best_state), places=6)
+            self.assertTrue(best_energy <= energy)
+
+    def test_temperature_ladder(self):
+        'Check that the ladder runs geometrically from tmin to tmax.'
+        ladder = temperature_ladder(1.0, 100.0, 3)
+        self.assertEqual(len(ladder), 3)
+        self.assertAlmostEqual(ladder[0], 1.0)
+        self.assertAlmostEqual(ladder[1], 10.0)
+        self.assertAlmostEqual(ladder[2], 100.0)
+        self.assertEqual(temperature_ladder(2.0, 100.0, 1), [2.0])
+
+    def test_exchange_replicas(self):
+        'Check that swaps move every energy with its state.'
+        rng = random.Random(0)
+        temperatures = temperature_ladder(1.0, 50.0, 6)
+        for offset in (0, 1, 0, 1):
+            states = [[random.uniform(-1, 1) for _ in range(5)] for _ in temperatures]
+            energies = [self.energy(state) for state in states]
+            pairs = zip(map(tuple, states), energies)
+            exchange_replicas(states, energies, temperatures, offset, rng)
+            self.assertEqual(sorted(zip(map(tuple, states), energies)), sorted(pairs))
+            for state, energy in zip(states, energies):
+                self.assertEqual(energy, self.energy(state))
+        ## A colder replica always takes a lower energy from its hotter neighbour.
+        states, energies = ['cold', 'hot'], [10.0, 1.0]
+        exchange_replicas(states, energies, [1.0, 2.0], 0, rng)
+        self.assertEqual((states, energies), (['hot', 'cold'], [1.0, 10.0]))
+
+    def test_replica_exchange(self):
+        'Check that replica exchange returns the best state seen with its energy.'
+        random.seed(0)
+        temperatures = temperature_ladder(0.5, 20.0, 3)
+        weights, energy, replicas = replica_exchange(self.features, self.labels, temperatures,
+                                                     4, 50, seed=1, processes=2)
+        self.assertAlmostEqual(energy, self.energy(weights), places=6)
+        self.assertEqual([replica['temperature'] for replica in replicas], temperatures)
+        for replica in replicas:
+            self.assertEqual([round_number for round_number, _ in replica['trace']], range(4))
+            self.assertTrue(min(trace_energy for _, trace_energy in replica['trace']) >= energy - 1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+'''Contains nearest centroid and k-nearest neighbour classifiers for feature matrices.
+
+Both predict in blocks of frames with array operations. The k-nearest
+neighbour classifier indexes its training frames with a KDTree built once
+when it is fitted.'''
+
+import numpy as np
+
+def squared_distances(points, others):
+    'Return the (points x others) matrix of squared euclidean distances.'
+    distances = np.dot(points, others.T)
+    distances *= -2
+    distances += np.einsum('ij,ij->i', points, points)[:, np.newaxis]
+    distances += np.einsum('ij,ij->i', others, others)[np.newaxis, :]
+    return np.maximum(distances, 0, out=distances)
+
+class NearestCentroid(object):
+    'A classifier that labels every frame with the class of the nearest class centroid.'
+    def __init__(self, block_size=65536):
+        self.block_size = block_size
+        self.classes = None
+        self.centroids = None
+
+    def fit(self, data, target):
+        'Compute the centroid of every class.'
+        data = np.asarray(data, dtype=np.float64)
+        self.classes, class_indices = np.unique(target, return_inverse=True)
+        ## A (classes x frames) one-hot matrix sums the frames of every class
+        ## in one matrix product, far faster than an unbuffered np.add.at.
+        one_hot = (class_indices == np.arange(len(self.classes))[:, np.newaxis]).astype(np.float64)
+        self.centroids = np.dot(one_hot, data)
+        self.centroids /= one_hot.sum(axis=1)[:, np.newaxis]
+        return self
+
+    def predict(self, data):
+        'Return the predicted class of every frame.'
+        data = np.asarray(data, dtype=np.float64)
+        predictions = np.empty(len(data), dtype=self.classes.dtype)
+        for start in xrange(0, len(data), self.block_size):
+            block = data[start:start + self.block_size]
+            predictions[start:start + len(block)] = self.classes[
+                squared_distances(block, self.centroids).argmin(axis=1)]
+        return predictions
+
+    def score(self, data, target):
+        'Return the share of frames predicted correctly.'
+        return float(np.mean(self.predict(data) == np.asarray(target)))
+
+class KDTree(object):
+    '''A k-d tree over the rows of a matrix.
+Nodes split the widest dimension of their bounding box at the median until
+they hold at most leaf_size rows. Queries run for a whole block of points at
+once: every point first searches the leaf it falls in, then the tree is
+walked with every point that a node's bounding box could still improve.'''
+    def __init__(self, data, leaf_size=256):
+        self.data = np.ascontiguousarray(data, dtype=np.float64)
+        self.leaf_size = leaf_size
+        self.indices = np.arange(len(self.data))
+        starts, ends, lowers, uppers = [], [], [], []
+        split_dims, split_values, lefts, rights = [], [], [], []
+        def add_node(start, end):
+            points = self.data[self.indices[start:end]]
+            starts.append(start)
+            ends.append(end)
+            lowers.append(points.min(axis=0) if end > start else np.zeros(self.data.shape[1]))
+            uppers.append(points.max(axis=0) if end > start else np.zeros(self.data.shape[1]))
+            split_dims.append(0)
+            split_values.append(0.0)
+            lefts.append(-1)
+            rights.append(-1)
+            return len(starts) - 1
+        stack = [add_node(0, len(self.data))]
+        while stack:
+            node = stack.pop()
+            start, end = starts[node], ends[node]
+            if end - start <= leaf_size:
+                continue
+            split_dim = int(np.argmax(uppers[node] - lowers[node]))
+            middle = (start + end) // 2
+            node_indices = self.indices[start:end]
+            order = np.argpartition(self.data[node_indices, split_dim], middle - start)
+            self.indices[start:end] = node_indices[order]
+            split_dims[node] = split_dim
+            split_values[node] = self.data[self.indices[middle], split_dim]
+            lefts[node] = add_node(start, middle)
+            rights[node] = add_node(middle, end)
+            stack.extend([lefts[node], rights[node]])
+        self.starts = np.array(starts)
+        self.ends = np.array(ends)
+        self.lowers = np.array(lowers)
+        self.uppers = np.array(uppers)
+        self.split_dims = np.array(split_dims)
+        self.split_values = np.array(split_values)
+        self.lefts = np.array(lefts)
+        self.rights = np.array(rights)
+
+    def _home_leaves(self, points):
+        'Return the leaf every point falls in.'
+        nodes = np.zeros(len(points), dtype=np.intp)
+        rows = np.arange(len(points))
+        inner = self.lefts[nodes] >= 0
+        while inner.any():
+            inner_nodes = nodes[inner]
+            go_left = (points[rows[inner], self.split_dims[inner_nodes]]
+                       < self.split_values[inner_nodes])
+            nodes[inner] = np.where(go_left, self.lefts[inner_nodes], self.rights[inner_nodes])
+            inner = self.lefts[nodes] >= 0
+        return nodes
+
+    def _search_leaf(self, node, points, rows, best_distances, best_indices):
+        'Merge the rows of a leaf into the best neighbours found so far for the given points.'
+        leaf_indices = self.indices[self.starts[node]:self.ends[node]]
+        k = best_distances.shape[1]
+        distances = np.hstack([best_distances[rows],
+                               squared_distances(points[rows], self.data[leaf_indices])])
+        indices = np.hstack([best_indices[rows],
+                             np.broadcast_to(leaf_indices, (len(rows), len(leaf_indices)))])
+        if distances.shape[1] > k:
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            distances = np.take_along_axis(distances, nearest, axis=1)
+            indices = np.take_along_axis(indices, nearest, axis=1)
+        best_distances[rows] = distances
+        best_indices[rows] = indices
+
+    def query(self, points, k=1):
+        '''Return the distances to and the row indices of the k nearest rows of every point,
+each sorted from nearest to farthest.'''
+        points = np.ascontiguousarray(points, dtype=np.float64)
+        best_distances = np.full((len(points), k), np.inf)
+        best_indices = np.full((len(points), k), -1, dtype=np.intp)
+        homes = self._home_leaves(points)
+        for node in np.unique(homes):
+            self._search_leaf(node, points, np.flatnonzero(homes == node),
+                              best_distances, best_indices)
+        stack = [(0, np.arange(len(points)))]
+        while stack:
+            node, rows = stack.pop()
+            gaps = (np.maximum(self.lowers[node] - points[rows], 0)
+                    + np.maximum(points[rows] - self.uppers[node], 0))
+            rows = rows[np.einsum('ij,ij->i', gaps, gaps) < best_distances[rows, -1]]
+            if not len(rows):
+                continue
+            if self.lefts[node] < 0:
+                rows = rows[homes[rows] != node]
+                if len(rows):
+                    self._search_leaf(node, points, rows, best_distances, best_indices)
+            else:
+                stack.append((self.rights[node], rows))
+                stack.append((self.lefts[node], rows))
+        order = np.argsort(best_distances, axis=1)
+        return (np.sqrt(np.take_along_axis(best_distances, order, axis=1)),
+                np.take_along_axis(best_indices, order, axis=1))
+
+class KNeighborsClassifier(object):
+    '''A classifier that labels every frame with the most common class of its k
+nearest training frames, breaking ties in favour of the smallest class.'''
+    def __init__(self, k=5, leaf_size=256, block_size=4096):
+        self.k = k
+        self.leaf_size = leaf_size
+        self.block_size = block_size
+        self.tree = None
+        self.classes = None
+        self.class_indices = None
+
+    def fit(self, data, target):
+        'Index the training frames in a KDTree.'
+        self.tree = KDTree(data, self.leaf_size)
+        self.classes, self.class_indices = np.unique(target, return_inverse=True)
+        return self
+
+    def predict(self, data):
+        'Return the predicted class of every frame.'
+        data = np.asarray(data, dtype=np.float64)
+        k = min(self.k, len(self.class_indices))
+        predictions = np.empty(len(data), dtype=self.classes.dtype)
+        for start in xrange(0, len(data), self.block_size):
+            block = data[start:start + self.block_size]
+            _, neighbours = self.tree.query(block, k)
+            votes = np.zeros((len(block), len(self.classes)), dtype=np.intp)
+            np.add.at(votes, (np.arange(len(block))[:, np.newaxis], self.class_indices[neighbours]), 1)
+            predictions[start:start + len(block)] = self.classes[votes.argmax(axis=1)]
+        return predictions
+
+    def score(self, data, target):
+        'Return the share of frames predicted correctly.'
+        return float(np.mean(self.predict(data) == np.asarray(target)))
@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+from classify import squared_distances, NearestCentroid, KDTree, KNeighborsClassifier
+
+class TestClassify(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.data = rng.randn(2000, 6)
+        self.target = rng.randint(-1, 2, 2000)
+        self.data[:, 0] += self.target * 2
+        self.queries = rng.randn(300, 6)
+
+    def test_nearest_centroid(self):
+        'Check that every frame gets the class of the nearest class mean.'
+        classifier = NearestCentroid(block_size=64).fit(self.data, self.target)
+        classes = np.array([-1, 0, 1])
+        means = np.array([self.data[self.target == label].mean(axis=0) for label in classes])
+        self.assertTrue(np.allclose(classifier.centroids, means))
+        expected = classes[np.array([np.argmin([np.sum((query - mean) ** 2) for mean in means])
+                                     for query in self.queries])]
+        self.assertTrue((classifier.predict(self.queries) == expected).all())
+
+    def test_kdtree_query(self):
+        'Check that the tree finds the same neighbours as a brute force search.'
+        tree = KDTree(self.data, leaf_size=16)
+        distances, indices = tree.query(self.queries, 4)
+        brute = squared_distances(self.queries, self.data)
+        self.assertTrue((np.sort(indices, axis=1) == np.sort(np.argsort(brute, axis=1)[:, :4], axis=1)).all())
+        self.assertTrue(np.allclose(distances, np.sqrt(np.sort(brute, axis=1)[:, :4])))
+
+    def test_kneighbors(self):
+        'Check that every frame gets the majority class of its neighbours.'
+        classifier = KNeighborsClassifier(k=3, leaf_size=16, block_size=64).fit(self.data, self.target)
+        neighbours = np.argsort(squared_distances(self.queries, self.data), axis=1)[:, :3]
+        expected = [np.argmax(np.bincount(self.target[row] + 1)) - 1 for row in neighbours]
+        self.assertTrue((classifier.predict(self.queries) == expected).all())
+        classifier = KNeighborsClassifier(k=1).fit(self.data, self.target)
+        self.assertEqual(classifier.score(self.data, self.target), 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,19 +1,82 @@
 '''A list of global constants used throughout the program.
-They should never be edited during runtime.'''
+They should never be edited during runtime.
+
+Settings that depend on the environment are held by a Config object that
+get_config builds on first use and caches for the rest of the process, so
+importing this module has no side effects.'''
 
 from os import environ
 from os.path import join
 import json
+import numpy as np
 
-APP_DATA_DIR_NAME = environ['APPDATA']
 KINECT_EXPERIMENT_DIR_NAME = 'KinectExperiment'
-KINECT_EXPERIMENT_DIR = join(APP_DATA_DIR_NAME, 'KinectExperiment')
-
 RELEVANT_JOINTS_FILE_NAME = 'RelevantJoints.json'
-with file(join(KINECT_EXPERIMENT_DIR, RELEVANT_JOINTS_FILE_NAME)) as f_obj:
-    RELEVANT_JOINTS = json.load(f_obj)
 
-RELEVANT_JOINT_PAIRS = [(joint_one, joint_two)
-    for joint_one in RELEVANT_JOINTS
-    for joint_two in RELEVANT_JOINTS
-    if not (joint_one >= joint_two)]
+## Option keys that override the environment and the relevant joints file.
+OPTION_KEYS = ('kinect_experiment_dir', 'relevant_joints')
+
+class ConfigError(Exception):
+    'Raised when the experiment directory cannot be found from the overrides or the environment.'
+    pass
+
+class Config(object):
+    '''The settings of one process.
+The relevant joints have fixed indices given by joint_index and every row of
+pair_indices holds the indices of the joints of one relevant joint pair.'''
+    def __init__(self, kinect_experiment_dir, relevant_joints):
+        self.kinect_experiment_dir = kinect_experiment_dir
+        self.relevant_joints = list(relevant_joints)
+        self.relevant_joint_pairs = [(joint_one, joint_two)
+            for joint_one in self.relevant_joints
+            for joint_two in self.relevant_joints
+            if not (joint_one >= joint_two)]
+        self.joint_index = {joint : i for i, joint in enumerate(self.relevant_joints)}
+        self.pair_indices = np.array([(self.joint_index[joint_one], self.joint_index[joint_two])
+                                      for joint_one, joint_two in self.relevant_joint_pairs],
+                                     dtype=np.intp).reshape(-1, 2)
+
+_overrides = {}
+_config = None
+
+def configure(**overrides):
+    '''Override settings for this process and drop the cached config.
+The keys are those in OPTION_KEYS and a value of None removes an override.'''
+    global _config
+    for key, value in overrides.iteritems():
+        if key not in OPTION_KEYS:
+            raise TypeError('unknown config option %r' % (key,))
+        if value is None:
+            _overrides.pop(key, None)
+        else:
+            _overrides[key] = value
+    _config = None
+
+def configure_from_options(option_info):
+    'Override settings with the config keys found in option info.'
+    configure(**{key : option_info[key] for key in OPTION_KEYS if key in option_info})
+
+def get_config():
+    '''Return the config of this process, building it on first use.
+Overrides come first, then the KINECT_EXPERIMENT_DIR and
+KINECT_RELEVANT_JOINTS (comma separated) environment variables, then
+APPDATA and the relevant joints file in the experiment directory.'''
+    global _config
+    if _config is None:
+        _config = _load_config()
+    return _config
+
+def _load_config():
+    kinect_experiment_dir = (_overrides.get('kinect_experiment_dir')
+                             or environ.get('KINECT_EXPERIMENT_DIR'))
+    if not kinect_experiment_dir:
+        if 'APPDATA' not in environ:
+            raise ConfigError('set APPDATA or KINECT_EXPERIMENT_DIR to find the experiment directory')
+        kinect_experiment_dir = join(environ['APPDATA'], KINECT_EXPERIMENT_DIR_NAME)
+    relevant_joints = _overrides.get('relevant_joints')
+    if relevant_joints is None and environ.get('KINECT_RELEVANT_JOINTS'):
+        relevant_joints = environ['KINECT_RELEVANT_JOINTS'].split(',')
+    if relevant_joints is None:
+        with file(join(kinect_experiment_dir, RELEVANT_JOINTS_FILE_NAME)) as f_obj:
+            relevant_joints = json.load(f_obj)
+    return Config(kinect_experiment_dir, relevant_joints)
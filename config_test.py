@@ -0,0 +1,42 @@
+import unittest
+import os
+from os.path import abspath, dirname, join
+from config import configure, get_config, ConfigError
+
+class TestConfig(unittest.TestCase):
+    def setUp(self):
+        self.environ = dict(os.environ)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        configure(kinect_experiment_dir=None, relevant_joints=None)
+
+    def test_relevant_joints_file(self):
+        'Check that the relevant joints and their index tables are read lazily and cached.'
+        configure(kinect_experiment_dir=join(dirname(abspath(__file__)), 'KinectExperiment'))
+        config = get_config()
+        self.assertTrue(get_config() is config)
+        self.assertEqual(len(config.relevant_joint_pairs), 15)
+        for (joint_one, joint_two), (index_one, index_two) in zip(config.relevant_joint_pairs,
+                                                                  config.pair_indices):
+            self.assertEqual(config.relevant_joints[index_one], joint_one)
+            self.assertEqual(config.relevant_joints[index_two], joint_two)
+            self.assertTrue(joint_one < joint_two)
+
+    def test_overrides(self):
+        'Check that overrides come before the environment.'
+        os.environ['KINECT_EXPERIMENT_DIR'] = 'from_environ'
+        os.environ['KINECT_RELEVANT_JOINTS'] = 'Head,HipCenter'
+        self.assertEqual(get_config().kinect_experiment_dir, 'from_environ')
+        self.assertEqual(get_config().relevant_joint_pairs, [('Head', 'HipCenter')])
+        configure(kinect_experiment_dir='from_options', relevant_joints=['B', 'A', 'C'])
+        self.assertEqual(get_config().kinect_experiment_dir, 'from_options')
+        self.assertEqual(get_config().relevant_joint_pairs, [('B', 'C'), ('A', 'B'), ('A', 'C')])
+
+    def test_missing_environment(self):
+        'Check that a missing experiment directory is reported when the config is first used.'
+        for key in ('APPDATA', 'KINECT_EXPERIMENT_DIR'):
+            os.environ.pop(key, None)
+        configure()
+        self.assertRaises(ConfigError, get_config)
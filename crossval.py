@@ -0,0 +1,86 @@
+'''Contains a cross-validation engine that splits one shared feature matrix with index arrays.'''
+
+from multiprocessing import Pool
+import random
+import numpy as np
+from anneal import train_weights, score_weight_matrix
+
+def kfold_splits(count, folds, rng):
+    'Return (training indices, testing indices) for every fold of a shuffled k-fold split.'
+    parts = np.array_split(rng.permutation(count), folds)
+    return [(np.concatenate(parts[:i] + parts[i + 1:]), parts[i]) for i in xrange(folds)]
+
+def stratified_kfold_splits(labels, folds, rng):
+    '''Return (training indices, testing indices) for every fold of a k-fold split
+where every fold holds about the same share of each label.'''
+    parts = [[] for _ in xrange(folds)]
+    offset = 0
+    for label in np.unique(labels):
+        label_indices = rng.permutation(np.flatnonzero(labels == label))
+        ## Start each label where the last one left off so the remainders spread out.
+        for i, part in enumerate(np.array_split(label_indices, folds)):
+            parts[(i + offset) % folds].append(part)
+        offset += len(label_indices)
+    parts = [np.sort(np.concatenate(part)) for part in parts]
+    return [(np.concatenate(parts[:i] + parts[i + 1:]), parts[i]) for i in xrange(folds)]
+
+def cross_validation_splits(labels, folds, stratified=False, repeats=1, seed=None):
+    'Return the splits of repeats k-fold splits, each shuffled differently.'
+    rng = np.random.RandomState(seed)
+    splits = []
+    for _ in xrange(repeats):
+        if stratified:
+            splits.extend(stratified_kfold_splits(labels, folds, rng))
+        else:
+            splits.extend(kfold_splits(len(labels), folds, rng))
+    return splits
+
+## Data for the folds trained by a worker process. It is set once per
+## worker by the pool initializer rather than pickled with every fold.
+_SHARED = {}
+
+def _share_fold_data(features, labels, trainer, trainer_options):
+    'Keep the feature matrix and trainer of the pool in this worker process.'
+    _SHARED['features'] = features
+    _SHARED['labels'] = labels
+    _SHARED['trainer'] = trainer
+    _SHARED['trainer_options'] = trainer_options
+
+def _run_fold(args):
+    fold_seed, training, testing = args
+    features, labels = _SHARED['features'], _SHARED['labels']
+    random.seed(fold_seed)
+    ## The trainers need their rows together, so only the training rows of
+    ## this fold are gathered, inside the worker training it.
+    weights, _ = train_weights(_SHARED['trainer'], features[training], labels[training],
+                               **_SHARED['trainer_options'])
+    scores = score_weight_matrix(features[testing], labels[testing], weights)
+    scores['weights'] = weights
+    return scores
+
+def cross_validate(features, labels, trainer, folds=5, stratified=False, repeats=1,
+                   seed=None, processes=None, splits=None, **trainer_options):
+    '''Train the named trainer on every fold in a process pool and score it on the held out frames.
+The folds are made by cross_validation_splits unless splits of (training
+indices, testing indices) are given, such as leave one session out splits.
+Return the scores of every fold and the mean, standard deviation, minimum
+and maximum of their accuracy.'''
+    if splits is None:
+        splits = cross_validation_splits(labels, folds, stratified, repeats, seed)
+    rng = random.Random(seed)
+    pool = Pool(processes, _share_fold_data, (features, labels, trainer, trainer_options))
+    try:
+        fold_scores = pool.map(_run_fold,
+                               [(rng.random(), training, testing) for training, testing in splits],
+                               chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    accuracies = np.array([scores['accuracy'] for scores in fold_scores])
+    return {
+        'folds' : fold_scores,
+        'mean_accuracy' : float(accuracies.mean()),
+        'std_accuracy' : float(accuracies.std(ddof=1)) if len(accuracies) > 1 else 0.0,
+        'min_accuracy' : float(accuracies.min()),
+        'max_accuracy' : float(accuracies.max()),
+    }
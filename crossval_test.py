@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+from anneal import train_weights, score_weight_matrix
+from crossval import (kfold_splits, stratified_kfold_splits, cross_validation_splits,
+                      cross_validate)
+
+class TestCrossval(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.labels = rng.randint(-1, 2, 53).astype(np.float64)
+        self.features = rng.uniform(0, 2, (53, 4)) - 0.3 * self.labels[:, np.newaxis]
+
+    def assertPartition(self, splits, count):
+        self.assertEqual(sorted(np.concatenate([testing for _, testing in splits]).tolist()), range(count))
+        for training, testing in splits:
+            self.assertEqual(sorted(training.tolist() + testing.tolist()), range(count))
+
+    def test_kfold_splits(self):
+        'Check that the test folds partition the frames and each training set is the rest.'
+        splits = kfold_splits(53, 5, np.random.RandomState(0))
+        self.assertEqual(len(splits), 5)
+        self.assertPartition(splits, 53)
+        self.assertEqual(sorted(len(testing) for _, testing in splits), [10, 10, 11, 11, 11])
+
+    def test_stratified_kfold_splits(self):
+        'Check that the count of every label differs by at most one across the test folds.'
+        splits = stratified_kfold_splits(self.labels, 4, np.random.RandomState(0))
+        self.assertPartition(splits, 53)
+        for label in np.unique(self.labels):
+            counts = [int((self.labels[testing] == label).sum()) for _, testing in splits]
+            self.assertTrue(max(counts) - min(counts) <= 1)
+
+    def test_repeats(self):
+        'Check that every repeat is a partition shuffled differently.'
+        for stratified in (False, True):
+            splits = cross_validation_splits(self.labels, 5, stratified, repeats=3, seed=0)
+            self.assertEqual(len(splits), 15)
+            repeats = [splits[i:i + 5] for i in xrange(0, 15, 5)]
+            for repeat in repeats:
+                self.assertPartition(repeat, 53)
+            first_folds = [sorted(repeat[0][1].tolist()) for repeat in repeats]
+            self.assertNotEqual(first_folds[0], first_folds[1])
+            self.assertNotEqual(first_folds[1], first_folds[2])
+            self.assertEqual([testing.tolist() for _, testing in splits],
+                             [testing.tolist() for _, testing in
+                              cross_validation_splits(self.labels, 5, stratified, repeats=3, seed=0)])
+
+    def test_cross_validate(self):
+        'Check the fold scores and their summary with the ridge trainer.'
+        splits = cross_validation_splits(self.labels, 4, repeats=2, seed=0)
+        result = cross_validate(self.features, self.labels, 'ridge', splits=splits, processes=2)
+        self.assertEqual(len(result['folds']), 8)
+        for (training, testing), scores in zip(splits, result['folds']):
+            weights, _ = train_weights('ridge', self.features[training], self.labels[training])
+            self.assertTrue(np.allclose(scores['weights'], weights))
+            self.assertEqual(scores['accuracy'],
+                             score_weight_matrix(self.features[testing], self.labels[testing],
+                                                 weights)['accuracy'])
+        accuracies = [scores['accuracy'] for scores in result['folds']]
+        mean = sum(accuracies) / len(accuracies)
+        self.assertAlmostEqual(result['mean_accuracy'], mean)
+        self.assertAlmostEqual(result['std_accuracy'],
+                               (sum((a - mean) ** 2 for a in accuracies) / (len(accuracies) - 1)) ** 0.5)
+        self.assertEqual(result['min_accuracy'], min(accuracies))
+        self.assertEqual(result['max_accuracy'], max(accuracies))
+        single = cross_validate(self.features, self.labels, 'ridge', splits=splits[:1], processes=1)
+        self.assertEqual(single['std_accuracy'], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+'''Contains a runner for comparing preprocessing variants over many seeded trials.'''
+
+from copy import deepcopy
+from multiprocessing import Pool, cpu_count
+import math
+import random
+import numpy as np
+from classify import NearestCentroid
+from features import upper_triangle_pairs, pair_columns, pair_distance_matrix
+from normal import normalize_origin, normalize_scale
+
+def scale_only(frames):
+    'Scale the frames so HipCenter to Head has unit length.'
+    return normalize_scale(frames, 'HipCenter', 'Head', in_place=True)
+
+def origin_and_scale(frames):
+    'Move the origin of the frames to HipCenter and scale them so HipCenter to Head has unit length.'
+    return normalize_scale(normalize_origin(frames, 'HipCenter', in_place=True),
+                           'HipCenter', 'Head', in_place=True)
+
+def featurize(frames):
+    'Return the distances between every pair of joints and the labels of a FrameStore.'
+    columns = pair_columns(frames.joint_index, upper_triangle_pairs(frames.joint_names))
+    return pair_distance_matrix(frames.positions, *columns), frames.labels.copy()
+
+def prepare_variants(frames, variants):
+    '''Preprocess and featurize a copy of the frames once for every variant.
+The variants map a name to a function that preprocesses a FrameStore in place.'''
+    return {name : featurize(preprocess(deepcopy(frames)))
+            for name, preprocess in variants.iteritems()}
+
+def split_indices(trial_seed, frame_count):
+    '''Return the training and testing indices of a trial.
+The frames are shuffled with random and then split with a numpy
+permutation, both seeded with the trial seed.'''
+    np.random.seed(trial_seed)
+    random.seed(trial_seed)
+    order = range(frame_count)
+    random.shuffle(order)
+    indices = np.array(order)[np.random.permutation(frame_count)]
+    return indices[:-frame_count / 2], indices[-frame_count / 2:]
+
+def nearest_centroid_accuracy(data_train, target_train, data_test, target_test):
+    'Return the accuracy of a nearest centroid classifier on the testing data.'
+    return NearestCentroid().fit(data_train, target_train).score(data_test, target_test)
+
+## Variant data for the trials run by a worker process. It is set once per
+## worker by the pool initializer rather than pickled with every trial.
+_SHARED = {}
+
+def _share_variant_data(variant_data, classifier):
+    'Keep the variant data of the pool in this worker process.'
+    _SHARED['variant_data'] = variant_data
+    _SHARED['classifier'] = classifier
+
+def _run_trial(trial_seed):
+    accuracies = {}
+    frame_count = len(next(_SHARED['variant_data'].itervalues())[1])
+    training, testing = split_indices(trial_seed, frame_count)
+    for name, (data, target) in _SHARED['variant_data'].iteritems():
+        accuracies[name] = _SHARED['classifier'](data[training], target[training],
+                                                 data[testing], target[testing])
+    return accuracies
+
+def run_trials(variant_data, trial_seeds, processes=None, classifier=nearest_centroid_accuracy):
+    '''Run one trial per seed in a process pool and return the accuracy of every
+variant in every trial. Every variant of a trial uses the same split.'''
+    processes = processes or cpu_count()
+    pool = Pool(processes, _share_variant_data, (variant_data, classifier))
+    try:
+        chunk_size = max(1, len(trial_seeds) // (4 * processes))
+        return pool.map(_run_trial, trial_seeds, chunksize=chunk_size)
+    finally:
+        pool.close()
+        pool.join()
+
+def wilson_interval(successes, count, z=1.96):
+    'Return the Wilson score interval of a proportion.'
+    if count == 0:
+        return 0.0, 1.0
+    proportion = float(successes) / count
+    denominator = 1 + z ** 2 / count
+    center = (proportion + z ** 2 / (2 * count)) / denominator
+    spread = z * math.sqrt(proportion * (1 - proportion) / count + z ** 2 / (4 * count ** 2)) / denominator
+    return center - spread, center + spread
+
+def compare_variants(results, baseline, challenger, z=1.96):
+    '''Summarize how often the challenger variant beats the baseline variant.
+Return the win, loss and tie counts, the win rate with its Wilson interval,
+and the mean accuracy of each variant and their mean difference with
+normal confidence intervals.'''
+    differences = np.array([trial[challenger] - trial[baseline] for trial in results])
+    wins = int(np.sum(differences > 0))
+    losses = int(np.sum(differences < 0))
+    ties = len(differences) - wins - losses
+    def mean_interval(values):
+        values = np.asarray(values, dtype=np.float64)
+        mean = float(values.mean())
+        if len(values) < 2:
+            return mean, (mean, mean)
+        half_width = z * float(values.std(ddof=1)) / math.sqrt(len(values))
+        return mean, (mean - half_width, mean + half_width)
+    return {
+        'trials' : len(results),
+        'wins' : wins,
+        'losses' : losses,
+        'ties' : ties,
+        'win_rate' : float(wins) / len(results) if results else 0.0,
+        'win_rate_interval' : wilson_interval(wins, len(results), z),
+        'baseline_accuracy' : mean_interval([trial[baseline] for trial in results]),
+        'challenger_accuracy' : mean_interval([trial[challenger] for trial in results]),
+        'difference' : mean_interval(differences),
+    }
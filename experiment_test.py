@@ -0,0 +1,63 @@
+import unittest
+import random
+import numpy as np
+from experiment import (split_indices, nearest_centroid_accuracy, run_trials,
+                        wilson_interval, compare_variants)
+
+class TestExperiment(unittest.TestCase):
+    def test_split_indices(self):
+        'Check that the split matches the shuffle then permutation indexing other.py used.'
+        for trial_seed, frame_count in ((0, 10), (7, 11), (123, 300)):
+            np.random.seed(trial_seed)
+            random.seed(trial_seed)
+            frames = range(frame_count)
+            random.shuffle(frames)
+            frames = np.array(frames)
+            indices = np.random.permutation(len(frames))
+            training, testing = split_indices(trial_seed, frame_count)
+            self.assertEqual(training.tolist(), frames[indices[:-len(frames)/2]].tolist())
+            self.assertEqual(testing.tolist(), frames[indices[-len(frames)/2:]].tolist())
+
+    def test_wilson_interval(self):
+        'Check the interval against known values.'
+        low, high = wilson_interval(5, 10)
+        self.assertAlmostEqual(low, 0.2366, places=4)
+        self.assertAlmostEqual(high, 0.7634, places=4)
+        low, high = wilson_interval(0, 10)
+        self.assertAlmostEqual(low, 0.0, places=9)
+        self.assertAlmostEqual(high, 0.2775, places=4)
+        low, high = wilson_interval(81, 263)
+        self.assertAlmostEqual(low, 0.2553, places=4)
+        self.assertAlmostEqual(high, 0.3662, places=4)
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
+
+    def test_compare_variants(self):
+        'Check the win, loss and tie counts and the mean difference.'
+        results = [{'a' : 0.5, 'b' : 0.6}, {'a' : 0.5, 'b' : 0.4},
+                   {'a' : 0.7, 'b' : 0.7}, {'a' : 0.2, 'b' : 0.9}]
+        summary = compare_variants(results, 'a', 'b')
+        self.assertEqual((summary['trials'], summary['wins'], summary['losses'], summary['ties']),
+                         (4, 2, 1, 1))
+        self.assertEqual(summary['win_rate'], 0.5)
+        self.assertEqual(summary['win_rate_interval'], wilson_interval(2, 4))
+        self.assertAlmostEqual(summary['difference'][0], 0.175)
+        self.assertAlmostEqual(summary['baseline_accuracy'][0], 0.475)
+        self.assertAlmostEqual(summary['challenger_accuracy'][0], 0.65)
+
+    def test_run_trials(self):
+        'Check that the pooled trials match trials run one at a time on the same splits.'
+        rng = np.random.RandomState(0)
+        target = rng.randint(-1, 2, 40)
+        variant_data = {'a' : (rng.randn(40, 3) + target[:, np.newaxis], target),
+                        'b' : (rng.randn(40, 3), target)}
+        results = run_trials(variant_data, [0, 1, 2], processes=2)
+        self.assertEqual(len(results), 3)
+        for trial_seed, accuracies in zip([0, 1, 2], results):
+            training, testing = split_indices(trial_seed, 40)
+            for name, (data, labels) in variant_data.iteritems():
+                self.assertEqual(accuracies[name],
+                                 nearest_centroid_accuracy(data[training], labels[training],
+                                                           data[testing], labels[testing]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+'''Contains functions for turning frames of skeleton data into feature matrices.'''
+
+import numpy as np
+from config import get_config
+from frames import FrameStore
+
+def upper_triangle_pairs(joint_names):
+    'Return every unordered pair of distinct joints once, in the order of the given joints.'
+    return [(joint_names[i], joint_names[j])
+            for i in xrange(len(joint_names))
+            for j in xrange(i + 1, len(joint_names))]
+
+def pair_columns(joint_index, joint_pairs):
+    'Return index arrays holding the column of the first and of the second joint of every pair.'
+    first_columns = np.array([joint_index[joint_one] for joint_one, _ in joint_pairs], dtype=np.intp)
+    second_columns = np.array([joint_index[joint_two] for _, joint_two in joint_pairs], dtype=np.intp)
+    return first_columns, second_columns
+
+def pair_distance_matrix(positions, first_columns, second_columns, block_size=65536):
+    '''Return a (frames x pairs) matrix of the distances between the joints in the given columns.
+Frames are handled block_size at a time to bound the size of temporary arrays.'''
+    distances = np.empty((len(positions), len(first_columns)))
+    for start in xrange(0, len(positions), block_size):
+        block = positions[start:start + block_size]
+        differences = block[:, first_columns] - block[:, second_columns]
+        np.sqrt(np.einsum('ijk,ijk->ij', differences, differences),
+                out=distances[start:start + block_size])
+    return distances
+
+def generate_distance_matrix(frames, joint_pairs=None):
+    '''Return a (frames x pairs) matrix of distances between joints and the label vector.
+Column i holds the distance for joint_pairs[i], which defaults to the relevant
+joint pairs of the config so weights keep their order. The frames may be a
+FrameStore or a list of frames.'''
+    if not isinstance(frames, FrameStore):
+        frames = FrameStore.from_frames(frames)
+    if joint_pairs is None:
+        config = get_config()
+        relevant_columns = frames.joint_columns(config.relevant_joints)
+        first_columns = relevant_columns[config.pair_indices[:, 0]]
+        second_columns = relevant_columns[config.pair_indices[:, 1]]
+    else:
+        first_columns, second_columns = pair_columns(frames.joint_index, joint_pairs)
+    return pair_distance_matrix(frames.positions, first_columns, second_columns), frames.labels.copy()
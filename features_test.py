@@ -0,0 +1,36 @@
+import unittest
+import random
+from os.path import abspath, dirname, join
+from config import configure, get_config
+from frames import FrameStore
+from anneal import generate_distances
+from features import upper_triangle_pairs, generate_distance_matrix
+
+class TestFeatures(unittest.TestCase):
+    def setUp(self):
+        configure(kinect_experiment_dir=join(dirname(abspath(__file__)), 'KinectExperiment'))
+        random.seed(0)
+        self.store = FrameStore.from_frames([
+            {'jointPositions' : {'jointPositionDict' : {
+                joint : [random.uniform(-2, 2) for _ in range(3)]
+                for joint in get_config().relevant_joints + ['Head', 'HipCenter']}},
+             'label' : random.choice([-1, 0, 1])}
+            for _ in range(10)])
+
+    def tearDown(self):
+        configure(kinect_experiment_dir=None)
+
+    def test_upper_triangle_pairs(self):
+        'Check that every pair of distinct joints appears once.'
+        self.assertEqual(upper_triangle_pairs(['a', 'b', 'c']),
+                         [('a', 'b'), ('a', 'c'), ('b', 'c')])
+
+    def test_generate_distance_matrix(self):
+        'Check that the matrix matches generate_distances column by column.'
+        features, labels = generate_distance_matrix(self.store)
+        self.assertEqual(features.shape, (10, len(get_config().relevant_joint_pairs)))
+        for row, label, frame in zip(features, labels, self.store):
+            distance_frame = generate_distances(frame)
+            self.assertEqual(label, distance_frame['label'])
+            for value, joint_pair in zip(row, get_config().relevant_joint_pairs):
+                self.assertAlmostEqual(value, distance_frame[joint_pair], places=12)
@@ -0,0 +1,134 @@
+'''Contains a columnar store for frames of skeleton data.'''
+
+from collections import MutableMapping
+
+import numpy as np
+
+class JointPositionView(MutableMapping):
+    '''A dict-style view of the joint positions of one frame in a frame store.
+Reading a joint returns a copy of its position and writing a joint writes
+through to the store.'''
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+    def __getitem__(self, joint_name):
+        column = self.store.joint_index[joint_name]
+        return tuple(self.store.positions[self.index, column].tolist())
+    def __setitem__(self, joint_name, vector):
+        column = self.store.joint_index[joint_name]
+        self.store.positions[self.index, column] = vector
+    def __delitem__(self, joint_name):
+        raise TypeError('joints cannot be removed from a frame store')
+    def __iter__(self):
+        return iter(self.store.joint_names)
+    def __len__(self):
+        return len(self.store.joint_names)
+
+class FrameView(object):
+    '''A dict-style view of one frame in a frame store.
+It has the same shape as a frame loaded from JSON, so older code that indexes
+frame['jointPositions']['jointPositionDict'] and frame['label'] keeps working.'''
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+    def __getitem__(self, key):
+        if key == 'jointPositions':
+            return {'jointPositionDict' : JointPositionView(self.store, self.index)}
+        elif key == 'label':
+            return int(self.store.labels[self.index])
+        raise KeyError(key)
+    def __setitem__(self, key, value):
+        if key == 'label':
+            self.store.labels[self.index] = value
+        else:
+            raise KeyError(key)
+    def keys(self):
+        return ['jointPositions', 'label']
+
+class FrameStore(object):
+    '''Frames of skeleton data held as one contiguous (frames x joints x 3) array.
+Joint names map to a fixed column through joint_index and labels are held in
+a separate vector.'''
+    def __init__(self, positions, labels, joint_names):
+        self.positions = np.ascontiguousarray(positions, dtype=np.float64)
+        self.labels = np.ascontiguousarray(labels, dtype=np.int8)
+        self.joint_names = list(joint_names)
+        self.joint_index = {joint_name : column
+                            for column, joint_name in enumerate(self.joint_names)}
+        if self.positions.ndim != 3 or self.positions.shape[1:] != (len(self.joint_names), 3):
+            raise ValueError('positions must have the shape (frames, %d, 3), not %s'
+                             % (len(self.joint_names), self.positions.shape))
+        if self.labels.shape != (len(self.positions),):
+            raise ValueError('expected %d labels, not %d'
+                             % (len(self.positions), len(self.labels)))
+
+    @classmethod
+    def empty(cls, frame_count, joint_names):
+        'Return a store with room for the given number of frames.'
+        return cls(np.zeros((frame_count, len(joint_names), 3)),
+                   np.zeros(frame_count, dtype=np.int8),
+                   joint_names)
+
+    @classmethod
+    def from_frames(cls, frames, joint_names=None):
+        'Build a store from frames shaped like the ones load_skeleton_data returns.'
+        frames = list(frames)
+        if joint_names is None:
+            joint_names = (sorted(frames[0]['jointPositions']['jointPositionDict'].keys())
+                           if frames else [])
+        store = cls.empty(len(frames), joint_names)
+        for i, frame in enumerate(frames):
+            store.set_frame(i, frame['jointPositions']['jointPositionDict'], frame['label'])
+        return store
+
+    @classmethod
+    def concatenate(cls, stores, joint_names=None):
+        'Join stores with the same joint order into one store.'
+        stores = list(stores)
+        if not stores:
+            return cls.empty(0, joint_names or [])
+        for store in stores[1:]:
+            if store.joint_names != stores[0].joint_names:
+                raise ValueError('cannot concatenate stores with different joints')
+        return cls(np.concatenate([store.positions for store in stores]),
+                   np.concatenate([store.labels for store in stores]),
+                   stores[0].joint_names)
+
+    def set_frame(self, index, joint_dict, label):
+        'Copy a dictionary of joint positions and a label into the given row.'
+        row = self.positions[index]
+        for joint_name, column in self.joint_index.iteritems():
+            row[column] = joint_dict[joint_name]
+        self.labels[index] = label
+
+    def joint_columns(self, joint_names):
+        'Return the column of every given joint as an index array.'
+        return np.array([self.joint_index[joint_name] for joint_name in joint_names],
+                        dtype=np.intp)
+
+    def take(self, indices):
+        'Return a new store holding copies of the frames at the given indices.'
+        indices = np.asarray(indices, dtype=np.intp)
+        return FrameStore(self.positions[indices], self.labels[indices], self.joint_names)
+
+    def to_frames(self):
+        'Return the frames as a list of plain dictionaries.'
+        return [{'jointPositions' : {'jointPositionDict' : dict(frame['jointPositions']['jointPositionDict'])},
+                 'label' : frame['label']}
+                for frame in self]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return FrameStore(self.positions[index], self.labels[index], self.joint_names)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('frame index out of range')
+        return FrameView(self, index)
+
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield FrameView(self, index)
@@ -0,0 +1,50 @@
+import unittest
+from copy import deepcopy
+from frames import FrameStore
+
+class TestFrameStore(unittest.TestCase):
+    def setUp(self):
+        self.frames = [
+            {'jointPositions' : {'jointPositionDict' : {
+                'Head' : [0.0, 1.0, 2.0],
+                'HipCenter' : [1.0, 1.0, 1.0]}},
+             'label' : 1},
+            {'jointPositions' : {'jointPositionDict' : {
+                'Head' : [3.0, 4.0, 5.0],
+                'HipCenter' : [-1.0, 0.5, 2.0]}},
+             'label' : -1},
+        ]
+        self.store = FrameStore.from_frames(self.frames)
+
+    def test_layout(self):
+        'Check that positions are one array with a fixed joint order.'
+        self.assertEqual(self.store.positions.shape, (2, 2, 3))
+        self.assertTrue(self.store.positions.flags['C_CONTIGUOUS'])
+        self.assertEqual(self.store.joint_names, ['Head', 'HipCenter'])
+        self.assertEqual(list(self.store.labels), [1, -1])
+
+    def test_dict_view(self):
+        'Check that frames read like the JSON frames.'
+        for frame, store_frame in zip(self.frames, self.store):
+            joints = store_frame['jointPositions']['jointPositionDict']
+            self.assertEqual(sorted(joints.keys()), ['Head', 'HipCenter'])
+            for joint, vector in frame['jointPositions']['jointPositionDict'].items():
+                self.assertEqual(joints[joint], tuple(vector))
+            self.assertEqual(store_frame['label'], frame['label'])
+        self.assertEqual(self.store.to_frames()[1]['label'], -1)
+
+    def test_write_through(self):
+        'Check that writing to a frame view writes to the store.'
+        frames = deepcopy(self.store)
+        frames[1]['jointPositions']['jointPositionDict']['Head'] = (0.0, 0.0, 0.0)
+        self.assertEqual(list(frames.positions[1, 0]), [0.0, 0.0, 0.0])
+        self.assertEqual(list(self.store.positions[1, 0]), [3.0, 4.0, 5.0])
+
+    def test_slice_and_take(self):
+        'Check that slicing and taking return stores.'
+        self.assertEqual(len(self.store[1:]), 1)
+        self.assertEqual(self.store[1:][0]['label'], -1)
+        taken = self.store.take([1, 0])
+        self.assertEqual(list(taken.labels), [-1, 1])
+        self.assertEqual(taken[1]['jointPositions']['jointPositionDict']['Head'],
+                         (0.0, 1.0, 2.0))
@@ -0,0 +1,98 @@
+'''Contains opt-in instrumentation for the stages of the training pipeline.
+
+Instrumentation is off until enable is called. Code reports to whatever
+current returns, which does nothing while instrumentation is off.'''
+
+from contextlib import contextmanager
+import json
+import os
+import resource
+from time import time
+
+def peak_rss_kb():
+    'Return the peak resident set size of this process in kilobytes.'
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def cpu_seconds():
+    'Return the user and system CPU time of this process in seconds.'
+    times = os.times()
+    return times[0] + times[1]
+
+class Instrumentation(object):
+    '''Records wall time, CPU time, peak memory and item counts for every stage
+and event rates such as annealing steps per second. A stage entered several
+times, for instance once per chunk of a stream, accumulates into one record.'''
+    def __init__(self):
+        self.stages = []
+        self.rates = {}
+        self._stage_index = {}
+
+    @contextmanager
+    def stage(self, name, items=0):
+        '''Time the body of a with statement as the named stage.
+The yielded record's 'items' may be increased inside the body. The stage is
+recorded even when the body raises.'''
+        record = {'items' : items}
+        start_rss = peak_rss_kb()
+        start_cpu = cpu_seconds()
+        start_wall = time()
+        try:
+            yield record
+        finally:
+            wall_seconds = time() - start_wall
+            cpu = cpu_seconds() - start_cpu
+            end_rss = peak_rss_kb()
+            if name not in self._stage_index:
+                self._stage_index[name] = len(self.stages)
+                self.stages.append({'name' : name, 'calls' : 0, 'items' : 0,
+                                    'wall_seconds' : 0.0, 'cpu_seconds' : 0.0,
+                                    'peak_rss_kb' : 0, 'peak_rss_growth_kb' : 0})
+            totals = self.stages[self._stage_index[name]]
+            totals['calls'] += 1
+            totals['items'] += record['items']
+            totals['wall_seconds'] += wall_seconds
+            totals['cpu_seconds'] += cpu
+            totals['peak_rss_kb'] = max(totals['peak_rss_kb'], end_rss)
+            totals['peak_rss_growth_kb'] += end_rss - start_rss
+
+    def record_rate(self, name, count, seconds):
+        'Record that count events of the given name happened in the given seconds.'
+        totals = self.rates.setdefault(name, {'count' : 0, 'seconds' : 0.0})
+        totals['count'] += count
+        totals['seconds'] += seconds
+        totals['per_second'] = totals['count'] / totals['seconds'] if totals['seconds'] else 0.0
+
+    def report(self):
+        'Return the recorded stages and rates as a dictionary.'
+        return {'stages' : self.stages, 'rates' : self.rates}
+
+    def write_report(self, file_name):
+        'Write the report to a JSON file.'
+        with open(file_name, 'w') as f_obj:
+            json.dump(self.report(), f_obj, indent=2, sort_keys=True)
+
+class NullInstrumentation(Instrumentation):
+    'Instrumentation that records nothing, used while instrumentation is off.'
+    @contextmanager
+    def stage(self, name, items=0):
+        yield {'items' : items}
+    def record_rate(self, name, count, seconds):
+        pass
+
+_null_instrumentation = NullInstrumentation()
+_instrumentation = None
+
+def enable():
+    'Turn instrumentation on for this process and return the new Instrumentation.'
+    global _instrumentation
+    _instrumentation = Instrumentation()
+    return _instrumentation
+
+def disable():
+    'Turn instrumentation off for this process.'
+    global _instrumentation
+    _instrumentation = None
+
+def current():
+    'Return the Instrumentation of this process, or one that records nothing.'
+    return _instrumentation or _null_instrumentation
@@ -0,0 +1,74 @@
+import unittest
+import json
+import shutil
+import tempfile
+from os.path import join
+import instrument
+from instrument import Instrumentation, NullInstrumentation
+
+class TestInstrument(unittest.TestCase):
+    def tearDown(self):
+        instrument.disable()
+
+    def test_stage(self):
+        'Check that repeated stages accumulate into one record in first-entered order.'
+        instrumentation = Instrumentation()
+        for items in (3, 4):
+            with instrumentation.stage('load', items) as stage:
+                stage['items'] += 1
+        with instrumentation.stage('featurize'):
+            pass
+        self.assertEqual([stage['name'] for stage in instrumentation.stages], ['load', 'featurize'])
+        load = instrumentation.stages[0]
+        self.assertEqual((load['calls'], load['items']), (2, 9))
+        self.assertTrue(load['wall_seconds'] >= 0.0 and load['cpu_seconds'] >= 0.0)
+        self.assertTrue(load['peak_rss_kb'] > 0)
+        self.assertEqual(instrumentation.stages[1]['calls'], 1)
+
+    def test_stage_that_raises(self):
+        'Check that a stage whose body raises is still recorded and the error passes through.'
+        instrumentation = Instrumentation()
+        def fail():
+            with instrumentation.stage('load', 5):
+                raise ValueError('bad chunk')
+        self.assertRaises(ValueError, fail)
+        self.assertEqual([(stage['name'], stage['calls'], stage['items'])
+                          for stage in instrumentation.stages], [('load', 1, 5)])
+
+    def test_record_rate(self):
+        'Check that rates accumulate their counts and seconds.'
+        instrumentation = Instrumentation()
+        instrumentation.record_rate('steps', 100, 2.0)
+        instrumentation.record_rate('steps', 50, 1.0)
+        instrumentation.record_rate('moves', 10, 0.0)
+        self.assertEqual(instrumentation.rates['steps'],
+                         {'count' : 150, 'seconds' : 3.0, 'per_second' : 50.0})
+        self.assertEqual(instrumentation.rates['moves']['per_second'], 0.0)
+        directory = tempfile.mkdtemp()
+        try:
+            file_name = join(directory, 'report.json')
+            instrumentation.write_report(file_name)
+            with open(file_name) as f_obj:
+                self.assertEqual(json.load(f_obj)['rates']['steps']['count'], 150)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_null_instrumentation(self):
+        'Check that the null instrumentation yields a record but keeps nothing.'
+        instrumentation = NullInstrumentation()
+        with instrumentation.stage('load', 2) as stage:
+            self.assertEqual(stage, {'items' : 2})
+        instrumentation.record_rate('steps', 100, 2.0)
+        self.assertEqual(instrumentation.report(), {'stages' : [], 'rates' : {}})
+
+    def test_enable_and_disable(self):
+        'Check that current follows enable and disable.'
+        self.assertTrue(isinstance(instrument.current(), NullInstrumentation))
+        instrumentation = instrument.enable()
+        self.assertTrue(instrument.current() is instrumentation)
+        self.assertFalse(isinstance(instrumentation, NullInstrumentation))
+        instrument.disable()
+        self.assertTrue(isinstance(instrument.current(), NullInstrumentation))
+
+if __name__ == '__main__':
+    unittest.main()
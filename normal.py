@@ -1,12 +1,33 @@
 
 from copy import deepcopy
 from math import sqrt
-from config import KINECT_EXPERIMENT_DIR
+import numpy as np
 from anneal import json_hash_to_vector
+from frames import FrameStore
 
-def normalize_origin(frames, center_joint):
-    'Return a new set of frames where every frame is translated so the origin is at the given center joint.'
-    frames = deepcopy(frames)
+def normalize_origin_array(positions, center_column, in_place=False):
+    'Translate every frame of a (frames x joints x 3) array so the origin is at the joint in the given column.'
+    if not in_place:
+        positions = positions.copy()
+    positions -= positions[:, center_column:center_column + 1]
+    return positions
+
+def normalize_scale_array(positions, column_one, column_two, in_place=False):
+    'Scale every frame of a (frames x joints x 3) array so the distance between the joints in the given columns is 1.'
+    if not in_place:
+        positions = positions.copy()
+    unit_lengths = np.sqrt(np.square(positions[:, column_one] - positions[:, column_two]).sum(axis=1))
+    positions /= unit_lengths[:, np.newaxis, np.newaxis]
+    return positions
+
+def normalize_origin(frames, center_joint, in_place=False):
+    '''Return a new set of frames where every frame is translated so the origin is at the given center joint.
+A FrameStore is normalized in a few array operations and can be changed in place.'''
+    if isinstance(frames, FrameStore):
+        positions = normalize_origin_array(frames.positions, frames.joint_index[center_joint], in_place)
+        return frames if in_place else FrameStore(positions, frames.labels.copy(), frames.joint_names)
+    if not in_place:
+        frames = deepcopy(frames)
     for i, frame in enumerate(frames):
         center = frame['jointPositions']['jointPositionDict'][center_joint]
         for jointType in frame['jointPositions']['jointPositionDict'].keys():
@@ -19,25 +40,30 @@ def normalize_origin(frames, center_joint):
             frames[i]['jointPositions']['jointPositionDict'][jointType] = new_vector
     return frames
 
-def normalize_scale(frames, joint_one, joint_two):
-    'Return a new set of frames where every frame is scaled so that the distance between the given joints is 1 and the ratios of the distances between joints is unchanged.'
-    frames = deepcopy(frames)
-    for frame in frames:
-        for i, frame in enumerate(frames):
-            first_vector = frame['jointPositions']['jointPositionDict'][joint_one]
-            second_vector = frame['jointPositions']['jointPositionDict'][joint_two]
-            unit_length = sqrt(
-                (first_vector[0] - second_vector[0])**2
-                + (first_vector[1] - second_vector[1])**2
-                + (first_vector[2] - second_vector[2])**2)
-            for jointType in frame['jointPositions']['jointPositionDict'].keys():
-                vector = frame['jointPositions']['jointPositionDict'][jointType]
-                new_vector = (
-                    vector[0] / unit_length,
-                    vector[1] / unit_length,
-                    vector[2] / unit_length,
-                )
-                frames[i]['jointPositions']['jointPositionDict'][jointType] = new_vector
+def normalize_scale(frames, joint_one, joint_two, in_place=False):
+    '''Return a new set of frames where every frame is scaled so that the distance between the given joints is 1 and the ratios of the distances between joints is unchanged.
+A FrameStore is normalized in a few array operations and can be changed in place.'''
+    if isinstance(frames, FrameStore):
+        positions = normalize_scale_array(frames.positions,
+                                          frames.joint_index[joint_one],
+                                          frames.joint_index[joint_two],
+                                          in_place)
+        return frames if in_place else FrameStore(positions, frames.labels.copy(), frames.joint_names)
+    if not in_place:
+        frames = deepcopy(frames)
+    for i, frame in enumerate(frames):
+        first_vector = frame['jointPositions']['jointPositionDict'][joint_one]
+        second_vector = frame['jointPositions']['jointPositionDict'][joint_two]
+        unit_length = sqrt(
+            (first_vector[0] - second_vector[0])**2
+            + (first_vector[1] - second_vector[1])**2
+            + (first_vector[2] - second_vector[2])**2)
+        for jointType in frame['jointPositions']['jointPositionDict'].keys():
+            vector = frame['jointPositions']['jointPositionDict'][jointType]
+            new_vector = (
+                vector[0] / unit_length,
+                vector[1] / unit_length,
+                vector[2] / unit_length,
+            )
+            frames[i]['jointPositions']['jointPositionDict'][jointType] = new_vector
     return frames
-
-
@@ -1,26 +1,23 @@
 import unittest
 import json
+import random
+import shutil
+import tempfile
 from os.path import join
 from normal import normalize_origin, normalize_scale
-from config import KINECT_EXPERIMENT_DIR
 from anneal import distance, json_hash_to_vector, load_skeleton_data
+from frames import FrameStore
+from synthetic import write_recording
 
 class TestNormal(unittest.TestCase):
     def setUp(self):
-        option_info = { "dir_name" : "11_11_2015_2_51_30_PMHalfProfile",
-          "file_name" : "leftLabels.csv",
-          "training_ratio" : "0.5"
-        }
-
-        ## Build path to file.
-        experiment_file_path  = join(
-            KINECT_EXPERIMENT_DIR,
-            option_info['dir_name'],
-            option_info['file_name']
-        )
-
-        ## Open file and extract JSON frames data.
+        ## Write a synthetic recording and extract JSON frames data.
+        self.directory = tempfile.mkdtemp()
+        experiment_file_path = join(self.directory, 'leftLabels.csv')
+        write_recording(experiment_file_path, 200, seed=0)
         self.frames = load_skeleton_data(experiment_file_path)
+    def tearDown(self):
+        shutil.rmtree(self.directory)
     def test_normalize_origin(self):
         'Check that the origin joint is zero.'
         center_joint = 'HipCenter'
@@ -51,6 +48,41 @@ class TestNormal(unittest.TestCase):
         head = ratios[0]
         for i, ratio in enumerate(ratios):
             self.assertTrue(abs(ratio - head) < 0.0000001, (ratio, head))
-            
-            
-        
+
+class TestBatchNormal(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.frames = [
+            {'jointPositions' : {'jointPositionDict' : {
+                joint : [random.uniform(-2, 2) for _ in range(3)]
+                for joint in ('Head', 'HipCenter', 'KneeLeft', 'KneeRight')}},
+             'label' : random.choice([-1, 0, 1])}
+            for _ in range(20)]
+        self.store = FrameStore.from_frames(self.frames)
+
+    def assertFramesAlmostEqual(self, store, frames):
+        for store_frame, frame in zip(store, frames):
+            store_joints = store_frame['jointPositions']['jointPositionDict']
+            for joint, vector in frame['jointPositions']['jointPositionDict'].items():
+                for actual, expected in zip(store_joints[joint], vector):
+                    self.assertAlmostEqual(actual, expected, places=12)
+            self.assertEqual(store_frame['label'], frame['label'])
+
+    def test_normalize_origin(self):
+        'Check that the batch origin normalization matches the frame by frame one.'
+        store = normalize_origin(self.store, 'HipCenter')
+        self.assertFramesAlmostEqual(store, normalize_origin(self.frames, 'HipCenter'))
+        self.assertFramesAlmostEqual(self.store, self.frames)
+
+    def test_normalize_scale(self):
+        'Check that the batch scale normalization matches the frame by frame one.'
+        store = normalize_scale(self.store, 'HipCenter', 'Head')
+        self.assertFramesAlmostEqual(store, normalize_scale(self.frames, 'HipCenter', 'Head'))
+
+    def test_in_place(self):
+        'Check that in place normalization changes the store it is given.'
+        expected = normalize_scale(normalize_origin(self.frames, 'HipCenter'), 'HipCenter', 'Head')
+        store = normalize_origin(self.store, 'HipCenter', in_place=True)
+        store = normalize_scale(store, 'HipCenter', 'Head', in_place=True)
+        self.assertTrue(store is self.store)
+        self.assertFramesAlmostEqual(self.store, expected)
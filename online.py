@@ -0,0 +1,111 @@
+'''Contains an online classifier for single frames from a live Kinect feed.
+
+Run it as a stand-in for the feed with
+    python online.py weights.json [port]
+It reads one raw JSON frame per line from stdin, or from every client of a
+local TCP socket when a port is given, and writes one label per line.'''
+
+import json
+import SocketServer
+from sys import argv, stdin, stdout
+from time import time
+import numpy as np
+from anneal import signum
+from config import get_config
+
+class OnlineClassifier(object):
+    '''Classifies raw frames shaped like the ones load_skeleton_data reads, one at a time.
+Every frame is normalized like normalize_origin and normalize_scale and turned
+into relevant pair distances in buffers allocated once, then scored with the
+trained weights. Training fits the weights so the score approximates the
+negated label, so the sign of the negated score is returned.'''
+    def __init__(self, weights, center_joint='HipCenter', scale_joints=('HipCenter', 'Head')):
+        config = get_config()
+        self.weights = np.asarray(weights, dtype=np.float64)
+        if self.weights.shape != (len(config.relevant_joint_pairs),):
+            raise ValueError('expected %d weights, not %d'
+                             % (len(config.relevant_joint_pairs), len(self.weights)))
+        self.joint_names = sorted(set(config.relevant_joints) | {center_joint} | set(scale_joints))
+        joint_index = {joint_name : column for column, joint_name in enumerate(self.joint_names)}
+        self._joint_columns = [(joint_name, joint_index[joint_name]) for joint_name in self.joint_names]
+        self._center_column = joint_index[center_joint]
+        self._scale_columns = [joint_index[joint_name] for joint_name in scale_joints]
+        relevant_columns = np.array([joint_index[joint_name] for joint_name in config.relevant_joints],
+                                    dtype=np.intp)
+        self._first_columns = relevant_columns[config.pair_indices[:, 0]]
+        self._second_columns = relevant_columns[config.pair_indices[:, 1]]
+        self._positions = np.empty((len(self.joint_names), 3))
+        self._center = np.empty(3)
+        self._scale = np.empty(3)
+        self._first = np.empty((len(self._first_columns), 3))
+        self._second = np.empty((len(self._second_columns), 3))
+        self._distances = np.empty(len(self._first_columns))
+
+    def _read_positions(self, frame):
+        joints = frame['jointPositions']['jointPositionDict']
+        positions = self._positions
+        for joint_name, column in self._joint_columns:
+            vector = joints[joint_name]
+            row = positions[column]
+            row[0] = float(vector['X'])
+            row[1] = float(vector['Y'])
+            row[2] = float(vector['Z'])
+
+    def features(self, frame):
+        '''Return the relevant pair distances of a raw frame.
+The returned array is a buffer that the next call overwrites.'''
+        self._read_positions(frame)
+        positions = self._positions
+        self._center[:] = positions[self._center_column]
+        np.subtract(positions, self._center, out=positions)
+        column_one, column_two = self._scale_columns
+        np.subtract(positions[column_one], positions[column_two], out=self._scale)
+        positions /= np.sqrt(np.dot(self._scale, self._scale))
+        positions.take(self._first_columns, axis=0, out=self._first)
+        positions.take(self._second_columns, axis=0, out=self._second)
+        np.subtract(self._first, self._second, out=self._first)
+        np.multiply(self._first, self._first, out=self._first)
+        self._first.sum(axis=1, out=self._distances)
+        return np.sqrt(self._distances, out=self._distances)
+
+    def classify(self, frame):
+        'Return the label, 1 for Yes, -1 for No or 0 for Null, of a raw frame.'
+        return -signum(np.dot(self.features(frame), self.weights))
+
+def measure_latency(classifier, frames, percentiles=(50, 99)):
+    'Classify every frame and return the given percentiles of the latency in milliseconds.'
+    latencies = np.empty(len(frames))
+    for i, frame in enumerate(frames):
+        start = time()
+        classifier.classify(frame)
+        latencies[i] = time() - start
+    return dict(zip(percentiles, np.percentile(latencies * 1000, percentiles)))
+
+def serve(classifier, lines, output):
+    'Classify one raw JSON frame per line and write one label per line.'
+    for line in lines:
+        if line.strip():
+            output.write('%d\n' % classifier.classify(json.loads(line)))
+            output.flush()
+
+def serve_socket(classifier, port, host='127.0.0.1'):
+    'Classify the frames sent by every client of a local TCP socket.'
+    class FrameHandler(SocketServer.StreamRequestHandler):
+        def handle(self):
+            serve(classifier, self.rfile, self.wfile)
+    server = SocketServer.TCPServer((host, port), FrameHandler)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    if len(argv) not in (2, 3):
+        print 'usage: %s weights-file [port]' % argv[0]
+        exit()
+    with open(argv[1]) as f_obj:
+        CLASSIFIER = OnlineClassifier(json.load(f_obj))
+    if len(argv) == 3:
+        serve_socket(CLASSIFIER, int(argv[2]))
+    else:
+        serve(CLASSIFIER, iter(stdin.readline, ''), stdout)
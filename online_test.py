@@ -0,0 +1,65 @@
+import unittest
+import json
+import random
+from os.path import abspath, dirname, join
+from StringIO import StringIO
+import numpy as np
+from config import configure, get_config
+from features import generate_distance_matrix
+from frames import FrameStore
+from normal import normalize_origin, normalize_scale
+from online import OnlineClassifier, serve
+
+class TestOnline(unittest.TestCase):
+    def setUp(self):
+        configure(kinect_experiment_dir=join(dirname(abspath(__file__)), 'KinectExperiment'))
+        random.seed(0)
+        self.store = FrameStore.from_frames([
+            {'jointPositions' : {'jointPositionDict' : {
+                joint : [random.uniform(-2, 2) for _ in range(3)]
+                for joint in get_config().relevant_joints + ['Head', 'HipCenter']}},
+             'label' : random.choice([-1, 0, 1])}
+            for _ in range(10)])
+        ## The frames as the feed sends them, with every vector as a hash.
+        self.raw_frames = [{'jointPositions' : {'jointPositionDict' : {
+                               joint : dict(zip('XYZ', vector))
+                               for joint, vector in frame['jointPositions']['jointPositionDict'].items()}}}
+                           for frame in self.store]
+        frames = normalize_scale(normalize_origin(self.store, 'HipCenter'), 'HipCenter', 'Head')
+        self.features, _ = generate_distance_matrix(frames)
+        ## Center the weights so the frames score on both sides of zero.
+        weights = np.array([random.uniform(-0.5, 0.5) for _ in get_config().relevant_joint_pairs])
+        mean = self.features.mean(axis=0)
+        self.weights = (weights - np.dot(mean, weights) / np.dot(mean, mean) * mean).tolist()
+
+    def tearDown(self):
+        configure(kinect_experiment_dir=None)
+
+    def test_features(self):
+        'Check that the online classifier computes the same features as the batch pipeline.'
+        classifier = OnlineClassifier(self.weights)
+        for raw_frame, row in zip(self.raw_frames, self.features):
+            for value, expected in zip(classifier.features(raw_frame), row):
+                self.assertAlmostEqual(value, expected, places=12)
+
+    def test_classify(self):
+        'Check that a frame is labeled with the sign of its negated score.'
+        classifier = OnlineClassifier(self.weights)
+        labels = [classifier.classify(raw_frame) for raw_frame in self.raw_frames]
+        self.assertEqual(labels, (-np.sign(np.dot(self.features, self.weights))).astype(int).tolist())
+        self.assertEqual(set(labels), set([-1, 1]))
+        self.assertEqual(OnlineClassifier([0.0] * len(self.weights)).classify(self.raw_frames[0]), 0)
+        self.assertRaises(ValueError, OnlineClassifier, self.weights[1:])
+
+    def test_serve(self):
+        'Check that every JSON line gets one label line and blank lines are skipped.'
+        classifier = OnlineClassifier(self.weights)
+        lines = StringIO('\n'.join([json.dumps(raw_frame) for raw_frame in self.raw_frames[:3]]
+                                   + ['', json.dumps(self.raw_frames[3])]) + '\n')
+        output = StringIO()
+        serve(classifier, lines, output)
+        self.assertEqual(output.getvalue(),
+                         ''.join('%d\n' % classifier.classify(raw_frame) for raw_frame in self.raw_frames[:4]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+'''Contains generators for reading skeleton recordings without loading them whole.'''
+
+import json
+from frames import FrameStore
+
+def json_hash_to_vector(vector_str):
+    'Convert a JSON hash representing a vector to a collection of numbers.'
+    return map(float, (vector_str['X'], vector_str['Y'], vector_str['Z']))
+
+def label_switch(enum_value):
+    'Convert a JSON integer value so that; Yes => 1, No => -1, Null => 0'
+    return {0 : 1, 1 : -1, 2 : 0}[enum_value]
+
+WHITESPACE = ' \t\n\r'
+
+def iter_json_array(f_obj, buffer_size=1 << 16):
+    '''Yield the items of the JSON array in the given file one at a time.
+Only the current item and a read buffer are held in memory.'''
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    at_end = False
+    expected = '['
+    while True:
+        while position < len(buffer) and buffer[position] in WHITESPACE:
+            position += 1
+        if position == len(buffer):
+            if at_end:
+                raise ValueError('unexpected end of JSON array')
+            buffer = f_obj.read(buffer_size)
+            position = 0
+            at_end = not buffer
+            continue
+        char = buffer[position]
+        if expected == '[':
+            if char != '[':
+                raise ValueError('expected a JSON array')
+            position += 1
+            expected = 'item or ]'
+            continue
+        if char == ']' and expected != 'item':
+            return
+        if expected == ', or ]':
+            if char != ',':
+                raise ValueError('expected , or ] in JSON array')
+            position += 1
+            expected = 'item'
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+            complete = end < len(buffer) or at_end
+        except ValueError:
+            if at_end:
+                raise
+            complete = False
+        if not complete:
+            ## The item runs past the buffer, so read more and decode it again.
+            data = f_obj.read(max(buffer_size, len(buffer) - position))
+            at_end = not data
+            buffer = buffer[position:] + data
+            position = 0
+            continue
+        position = end
+        expected = ', or ]'
+        yield item
+
+def iter_skeleton_frames(file_name):
+    'Yield the frames of a recording with their vectors and label converted.'
+    with open(file_name) as f_obj:
+        for frame in iter_json_array(f_obj):
+            joints = frame['jointPositions']['jointPositionDict']
+            for joint_type in joints.keys():
+                joints[joint_type] = json_hash_to_vector(joints[joint_type])
+            frame['label'] = label_switch(frame['label'])
+            yield frame
+
+def iter_skeleton_chunks(file_name, chunk_size=4096, joint_names=None):
+    '''Yield a recording as FrameStores of at most chunk_size frames.
+Every chunk uses the same joint order, taken from the first frame unless given.'''
+    store = None
+    filled = 0
+    with open(file_name) as f_obj:
+        for frame in iter_json_array(f_obj):
+            joints = frame['jointPositions']['jointPositionDict']
+            if store is None:
+                if joint_names is None:
+                    joint_names = sorted(joints.keys())
+                store = FrameStore.empty(chunk_size, joint_names)
+            row = store.positions[filled]
+            for joint_type, column in store.joint_index.iteritems():
+                row[column] = json_hash_to_vector(joints[joint_type])
+            store.labels[filled] = label_switch(frame['label'])
+            filled += 1
+            if filled == chunk_size:
+                yield store
+                store = FrameStore.empty(chunk_size, joint_names)
+                filled = 0
+    if filled:
+        yield store[:filled]
@@ -0,0 +1,45 @@
+import unittest
+import json
+import os
+import tempfile
+from StringIO import StringIO
+from stream import iter_json_array, iter_skeleton_frames, iter_skeleton_chunks
+
+class TestStream(unittest.TestCase):
+    def setUp(self):
+        self.raw_frames = [
+            {'jointPositions' : {'jointPositionDict' : {
+                'Head' : {'X' : '0.5', 'Y' : 1.0, 'Z' : 2.0},
+                'HipCenter' : {'X' : 1.0, 'Y' : '1.25', 'Z' : 1.0}}},
+             'label' : i % 3}
+            for i in range(7)]
+        f_handle, self.file_name = tempfile.mkstemp()
+        with os.fdopen(f_handle, 'w') as f_obj:
+            json.dump(self.raw_frames, f_obj, indent=2)
+
+    def tearDown(self):
+        os.remove(self.file_name)
+
+    def test_iter_json_array(self):
+        'Check that items are parsed across small read buffers.'
+        text = json.dumps([{'a' : [1, 2.5]}, 3, 'x', [], {}], indent=1)
+        for buffer_size in (1, 2, 7, 1024):
+            self.assertEqual(list(iter_json_array(StringIO(text), buffer_size)),
+                             [{'a' : [1, 2.5]}, 3, 'x', [], {}])
+        self.assertEqual(list(iter_json_array(StringIO(' [ ] '))), [])
+        self.assertRaises(ValueError, list, iter_json_array(StringIO('[1, 2')))
+
+    def test_iter_skeleton_frames(self):
+        'Check that vectors and labels are converted as frames are read.'
+        frames = list(iter_skeleton_frames(self.file_name))
+        self.assertEqual(len(frames), 7)
+        self.assertEqual(frames[0]['jointPositions']['jointPositionDict']['Head'], [0.5, 1.0, 2.0])
+        self.assertEqual([frame['label'] for frame in frames[:3]], [1, -1, 0])
+
+    def test_iter_skeleton_chunks(self):
+        'Check that chunks hold every frame in order.'
+        chunks = list(iter_skeleton_chunks(self.file_name, chunk_size=3))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 1])
+        self.assertEqual(chunks[2][0]['jointPositions']['jointPositionDict']['HipCenter'],
+                         (1.0, 1.25, 1.0))
+        self.assertEqual(list(chunks[1].labels), [1, -1, 0])
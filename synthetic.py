@@ -0,0 +1,75 @@
+'''Contains a generator of synthetic skeleton recordings in the KinectDataSaver JSON format.
+
+Run it with
+    python synthetic.py file-name frame-count [joint-count [seed]]'''
+
+import json
+import math
+import random
+from sys import argv
+
+## The joints of a Kinect skeleton. The ones the pipeline needs come first,
+## so a recording with 8 or more joints can be normalized and featurized.
+KINECT_JOINTS = [
+    'HipCenter', 'Head',
+    'KneeLeft', 'KneeRight', 'AnkleLeft', 'AnkleRight', 'FootLeft', 'FootRight',
+    'Spine', 'ShoulderCenter',
+    'ShoulderLeft', 'ElbowLeft', 'WristLeft', 'HandLeft',
+    'ShoulderRight', 'ElbowRight', 'WristRight', 'HandRight',
+    'HipLeft', 'HipRight',
+]
+
+## The enum values KinectDataSaver writes for Yes, No and Null labels.
+YES, NO, NULL = 0, 1, 2
+
+def synthetic_joint_names(joint_count):
+    'Return the names of the given number of joints, adding numbered joints past the Kinect ones.'
+    return (KINECT_JOINTS[:joint_count]
+            + ['Joint%d' % i for i in xrange(len(KINECT_JOINTS), joint_count)])
+
+def generate_frames(frame_count, joint_count=len(KINECT_JOINTS), seed=None):
+    '''Yield frames shaped like the JSON frames KinectDataSaver writes.
+The skeleton sways and moves about the room from frame to frame and the left
+leg is raised during the Yes frames, so the labels can be learned.'''
+    rng = random.Random(seed)
+    joint_names = synthetic_joint_names(joint_count)
+    pose = {joint_name : [rng.uniform(-0.4, 0.4), rng.uniform(-0.9, 0.6), rng.uniform(-0.2, 0.2)]
+            for joint_name in joint_names}
+    pose['HipCenter'] = [0.0, 0.0, 0.0]
+    pose['Head'] = [0.0, 0.7, 0.0]
+    raised_joints = set(['KneeLeft', 'AnkleLeft', 'FootLeft'])
+    label = NULL
+    for frame_index in xrange(frame_count):
+        if rng.random() < 0.02:
+            label = rng.choice([YES, NO, NULL])
+        center = (math.sin(frame_index / 200.0), 0.05 * math.sin(frame_index / 30.0), 2.5)
+        scale = 1.0 + 0.1 * math.sin(frame_index / 500.0)
+        joints = {}
+        for joint_name in joint_names:
+            x, y, z = pose[joint_name]
+            if label == YES and joint_name in raised_joints:
+                y += 0.3
+            joints[joint_name] = {
+                'X' : center[0] + scale * x + rng.gauss(0, 0.01),
+                'Y' : center[1] + scale * y + rng.gauss(0, 0.01),
+                'Z' : center[2] + scale * z + rng.gauss(0, 0.01),
+            }
+        yield {'jointPositions' : {'jointPositionDict' : joints}, 'label' : label}
+
+def write_recording(file_name, frame_count, joint_count=len(KINECT_JOINTS), seed=None):
+    'Write a synthetic recording one frame at a time.'
+    with open(file_name, 'w') as f_obj:
+        f_obj.write('[')
+        for i, frame in enumerate(generate_frames(frame_count, joint_count, seed)):
+            if i:
+                f_obj.write(',\n')
+            json.dump(frame, f_obj)
+        f_obj.write(']')
+
+if __name__ == '__main__':
+    if not 3 <= len(argv) <= 5:
+        print 'usage: %s file-name frame-count [joint-count [seed]]' % argv[0]
+        exit()
+    write_recording(argv[1], int(argv[2]),
+                    int(argv[3]) if len(argv) > 3 else len(KINECT_JOINTS),
+                    int(argv[4]) if len(argv) > 4 else None)
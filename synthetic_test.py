@@ -0,0 +1,47 @@
+import unittest
+import json
+import shutil
+import tempfile
+from os.path import join
+from stream import iter_skeleton_frames
+from synthetic import KINECT_JOINTS, YES, NO, NULL, synthetic_joint_names, write_recording
+
+class TestSynthetic(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = join(self.directory, 'labels.csv')
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_recording(self):
+        'Check that a recording parses with the requested frames, joints and label values.'
+        write_recording(self.file_name, 300, 12, seed=0)
+        with open(self.file_name) as f_obj:
+            self.assertTrue(set(frame['label'] for frame in json.load(f_obj)) <= set([YES, NO, NULL]))
+        frames = list(iter_skeleton_frames(self.file_name))
+        self.assertEqual(len(frames), 300)
+        for frame in frames:
+            joints = frame['jointPositions']['jointPositionDict']
+            self.assertEqual(sorted(joints), sorted(KINECT_JOINTS[:12]))
+            self.assertTrue(all(len(vector) == 3 for vector in joints.values()))
+        self.assertEqual(set(frame['label'] for frame in frames), set([-1, 0, 1]))
+
+    def test_joint_names(self):
+        'Check that joints past the Kinect ones are numbered.'
+        self.assertEqual(synthetic_joint_names(3), KINECT_JOINTS[:3])
+        self.assertEqual(synthetic_joint_names(len(KINECT_JOINTS) + 2),
+                         KINECT_JOINTS + ['Joint%d' % len(KINECT_JOINTS), 'Joint%d' % (len(KINECT_JOINTS) + 1)])
+        write_recording(self.file_name, 2, len(KINECT_JOINTS) + 2, seed=0)
+        for frame in iter_skeleton_frames(self.file_name):
+            self.assertEqual(len(frame['jointPositions']['jointPositionDict']), len(KINECT_JOINTS) + 2)
+
+    def test_seed(self):
+        'Check that the same seed writes the same recording.'
+        other_name = join(self.directory, 'other.csv')
+        write_recording(self.file_name, 20, seed=3)
+        write_recording(other_name, 20, seed=3)
+        with open(self.file_name) as f_obj, open(other_name) as other_obj:
+            self.assertEqual(f_obj.read(), other_obj.read())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+'''Contains functions for turning sequences of frames into sliding-window motion features.'''
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+from config import get_config
+from features import pair_columns, pair_distance_matrix
+from frames import FrameStore
+
+def sliding_windows(array, window, step=1):
+    '''Return a read-only (windows x window x ...) view of the windows over the first axis of an array.
+The windows share the memory of the array, so no window is copied.'''
+    count = max(0, (len(array) - window) // step + 1)
+    return as_strided(array,
+                      shape=(count, window) + array.shape[1:],
+                      strides=(array.strides[0] * step,) + array.strides,
+                      writeable=False)
+
+def temporal_feature_names(joint_names, joint_pairs):
+    'Return the name of every column of the matrix generate_temporal_matrix returns.'
+    return ([('speed', joint_name) for joint_name in joint_names]
+            + [('acceleration', joint_name) for joint_name in joint_names]
+            + [(statistic, joint_pair)
+               for statistic in ('distance_mean', 'distance_variance', 'distance_range')
+               for joint_pair in joint_pairs])
+
+def temporal_features(positions, distances, window, step=1):
+    '''Return a (windows x features) matrix of motion features of a sequence of frames.
+The positions are a (frames x joints x 3) array of the joints to follow and
+the distances a (frames x pairs) matrix. For every window the features hold
+the mean speed and the mean acceleration of every joint and the mean,
+variance and range of every distance. Speeds and accelerations are computed
+once per frame and the windows are strided views over them.'''
+    if window < 3:
+        raise ValueError('windows need at least 3 frames to measure acceleration')
+    velocities = np.diff(positions, axis=0)
+    speeds = np.sqrt(np.einsum('ijk,ijk->ij', velocities, velocities))
+    accelerations = np.diff(velocities, axis=0)
+    acceleration_sizes = np.sqrt(np.einsum('ijk,ijk->ij', accelerations, accelerations))
+    distance_windows = sliding_windows(distances, window, step)
+    return np.hstack([
+        sliding_windows(speeds, window - 1, step).mean(axis=1),
+        sliding_windows(acceleration_sizes, window - 2, step).mean(axis=1),
+        distance_windows.mean(axis=1),
+        ## Two passes over every window, since E[x^2] - E[x]^2 cancels
+        ## catastrophically for distances large next to their spread.
+        distance_windows.var(axis=1),
+        distance_windows.max(axis=1) - distance_windows.min(axis=1),
+    ])
+
+def generate_temporal_matrix(frames, window, step=1, joint_pairs=None):
+    '''Return a (windows x features) matrix of motion features and the label vector.
+Each window is labeled with the label of its last frame. Motion is followed
+for the relevant joints and the pairs default to the relevant joint pairs of
+the config. The columns are named by temporal_feature_names. The frames may be
+a FrameStore or a list of frames, in recording order.'''
+    if not isinstance(frames, FrameStore):
+        frames = FrameStore.from_frames(frames)
+    config = get_config()
+    if joint_pairs is None:
+        joint_pairs = config.relevant_joint_pairs
+    distances = pair_distance_matrix(frames.positions, *pair_columns(frames.joint_index, joint_pairs))
+    features = temporal_features(frames.positions[:, frames.joint_columns(config.relevant_joints)],
+                                 distances, window, step)
+    labels = sliding_windows(frames.labels, window, step)[:, -1].copy()
+    return features, labels
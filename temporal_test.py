@@ -0,0 +1,71 @@
+import unittest
+import random
+from os.path import abspath, dirname, join
+import numpy as np
+from config import configure, get_config
+from features import generate_distance_matrix
+from frames import FrameStore
+from temporal import sliding_windows, temporal_features, temporal_feature_names, generate_temporal_matrix
+
+class TestTemporal(unittest.TestCase):
+    def setUp(self):
+        configure(kinect_experiment_dir=join(dirname(abspath(__file__)), 'KinectExperiment'))
+        random.seed(0)
+        self.store = FrameStore.from_frames([
+            {'jointPositions' : {'jointPositionDict' : {
+                joint : [random.uniform(-2, 2) for _ in range(3)]
+                for joint in get_config().relevant_joints + ['Head', 'HipCenter']}},
+             'label' : random.choice([-1, 0, 1])}
+            for _ in range(10)])
+
+    def tearDown(self):
+        configure(kinect_experiment_dir=None)
+
+    def test_sliding_windows(self):
+        'Check that windows are views into the array they slide over.'
+        array = np.arange(20.0).reshape(10, 2)
+        windows = sliding_windows(array, 4, 3)
+        self.assertEqual(windows.shape, (3, 4, 2))
+        self.assertTrue(np.shares_memory(windows, array))
+        self.assertEqual(windows[2, 0, 0], array[6, 0])
+        self.assertEqual(sliding_windows(array, 11).shape, (0, 11, 2))
+
+    def test_generate_temporal_matrix(self):
+        'Check one window of temporal features against a direct computation.'
+        features, labels = generate_temporal_matrix(self.store, 4, 2)
+        self.assertEqual(features.shape, (4, 6 * 2 + 15 * 3))
+        positions = self.store.positions[2:6, self.store.joint_columns(get_config().relevant_joints)]
+        velocities = np.diff(positions, axis=0)
+        distances = generate_distance_matrix(self.store)[0][2:6]
+        expected = np.hstack([
+            np.sqrt((velocities ** 2).sum(axis=2)).mean(axis=0),
+            np.sqrt((np.diff(velocities, axis=0) ** 2).sum(axis=2)).mean(axis=0),
+            distances.mean(axis=0),
+            distances.var(axis=0),
+            distances.max(axis=0) - distances.min(axis=0)])
+        self.assertTrue(np.allclose(features[1], expected))
+        self.assertEqual(labels[1], self.store.labels[5])
+
+    def test_fewer_frames_than_window(self):
+        'Check that a recording shorter than the window has no windows.'
+        config = get_config()
+        features, labels = generate_temporal_matrix(self.store.take(np.arange(3)), 4)
+        self.assertEqual(features.shape,
+                         (0, len(temporal_feature_names(config.relevant_joints, config.relevant_joint_pairs))))
+        self.assertEqual(labels.shape, (0,))
+
+    def test_distance_variance(self):
+        'Check the variance of large, nearly constant distances against np.var.'
+        rng = np.random.RandomState(0)
+        ## The second column jumps halfway, so its windows sit far from its overall mean.
+        distances = 1e4 + 1e-3 * rng.randn(50, 2)
+        distances[25:, 1] += 1e6
+        positions = rng.randn(50, 1, 3)
+        features = temporal_features(positions, distances, 10, 5)
+        expected = np.array([[np.var(distances[start:start + 10, column]) for column in range(2)]
+                             for start in range(0, 41, 5)])
+        self.assertTrue(np.allclose(features[:, 4:6], expected, rtol=1e-6, atol=0))
+        self.assertTrue((features[:, 4:6] >= 0).all())
+
+if __name__ == '__main__':
+    unittest.main()